@@ -0,0 +1,168 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from booking_store import time_to_minutes
+
+# Working hours are 9:00 - 18:00
+WORKING_DAY_MINUTES = 9 * 60
+
+# A booking cancelled this close to (or after) its start is kept as a late cancellation
+LATE_CANCEL_MINUTES = 15
+
+MAX_LATE_CANCELLATIONS = 500
+
+
+def iso_week(date):
+    """Get the ISO week label (e.g. '2025-W31') for a 'YYYY-MM-DD' date"""
+    year, week, _ = datetime.strptime(date, '%Y-%m-%d').isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def is_late_cancellation(booking, now):
+    """Check if cancelling a booking now is within LATE_CANCEL_MINUTES of its start or later"""
+    try:
+        start = datetime.strptime(f"{booking['date']} {booking['start_time']}", '%Y-%m-%d %H:%M')
+    except (KeyError, ValueError):
+        return False
+    return now >= start - timedelta(minutes=LATE_CANCEL_MINUTES)
+
+
+class UtilizationStats:
+    """Incrementally maintained booking aggregates.
+
+    Aggregates are updated from booking store events instead of being
+    recomputed from the full booking history, so report queries only read
+    precomputed counters:
+
+    - booked minutes per (room, date)
+    - booked minutes per (company, ISO week)
+    - booked minutes per (room, weekday, hour)
+
+    Late cancellations are stored in the booking store as bookings with
+    status 'cancelled', so every worker reports the same list.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._room_day = {}
+        self._company_week = {}
+        self._room_hour = {}
+        self._stale = True
+        store.subscribe(self.on_booking_event)
+
+    def _apply(self, booking, sign):
+        """Add (sign=1) or remove (sign=-1) a booking from the aggregates"""
+        if booking.get('status') != 'confirmed':
+            return
+
+        try:
+            start = time_to_minutes(booking['start_time'])
+            end = time_to_minutes(booking['end_time'])
+            weekday = datetime.strptime(booking['date'], '%Y-%m-%d').weekday()
+            week = iso_week(booking['date'])
+        except (KeyError, ValueError) as e:
+            logging.error(f"Skipping booking {booking.get('id')} in stats: {e}")
+            return
+
+        if end <= start:
+            return
+
+        room_id = booking['room_id']
+        minutes = (end - start) * sign
+        self._bump(self._room_day, (room_id, booking['date']), minutes)
+        self._bump(self._company_week, (booking.get('user_company'), week), minutes)
+
+        # Split the booking across the hours it overlaps
+        hour_start = start
+        while hour_start < end:
+            hour = hour_start // 60
+            hour_end = min(end, (hour + 1) * 60)
+            self._bump(self._room_hour, (room_id, weekday, hour), (hour_end - hour_start) * sign)
+            hour_start = hour_end
+
+    @staticmethod
+    def _bump(counter, key, amount):
+        value = counter.get(key, 0) + amount
+        if value:
+            counter[key] = value
+        else:
+            counter.pop(key, None)
+
+    def _rebuild(self, bookings):
+        """Recompute all aggregates from a full list of bookings"""
+        self._room_day = {}
+        self._company_week = {}
+        self._room_hour = {}
+        for booking in bookings:
+            self._apply(booking, 1)
+
+    def on_booking_event(self, event, old, new):
+        """Booking store subscriber keeping the aggregates current"""
+        if event == 'reload':
+            # Rebuilt on the next query so several shards reloading at once cost one rebuild
+            self._stale = True
+            return
+
+        with self._lock:
+            if old:
+                self._apply(old, -1)
+            if new:
+                self._apply(new, 1)
+
+    def _refresh(self):
+        """Pick up changes on disk and rebuild if a reload made the aggregates stale"""
+        self._store.refresh()
+        if not self._stale:
+            return
+        # Booking events wait for the lock, so none can land between the snapshot and the rebuild
+        with self._lock:
+            if self._stale:
+                self._stale = False
+                self._rebuild(self._store.all())
+
+    def room_utilization(self, room_ids, date):
+        """Get booked minutes and utilization share of the working day per room"""
+        self._refresh()
+        result = {}
+        for room_id in room_ids:
+            minutes = self._room_day.get((room_id, date), 0)
+            result[room_id] = {
+                'booked_minutes': minutes,
+                'utilization': round(minutes / WORKING_DAY_MINUTES, 4)
+            }
+        return result
+
+    def room_hours(self, room_id):
+        """Get booked minutes per weekday (0 = Monday) and hour for a room"""
+        self._refresh()
+        result = {}
+        for weekday in range(7):
+            hours = {}
+            for hour in range(9, 18):
+                minutes = self._room_hour.get((room_id, weekday, hour), 0)
+                if minutes:
+                    hours[hour] = minutes
+            result[weekday] = hours
+        return result
+
+    def company_week_minutes(self, companies, week):
+        """Get booked minutes per company for an ISO week"""
+        self._refresh()
+        return {company: self._company_week.get((company, week), 0) for company in companies}
+
+    def late_cancellations(self):
+        """Get recent late cancellations, newest first"""
+        cancelled = [b for b in self._store.all() if b.get('status') == 'cancelled']
+        cancelled.sort(key=lambda b: b.get('cancelled_at', ''), reverse=True)
+        return [{
+            'booking_id': b['id'],
+            'room_id': b['room_id'],
+            'date': b['date'],
+            'start_time': b['start_time'],
+            'end_time': b['end_time'],
+            'user_name': b.get('user_name'),
+            'user_company': b.get('user_company'),
+            'cancelled_at': b.get('cancelled_at')
+        } for b in cancelled[:MAX_LATE_CANCELLATIONS]]
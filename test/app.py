@@ -1,10 +1,22 @@
 import os
-import json
 import logging
+import calendar
+from functools import wraps
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, g
 from werkzeug.middleware.proxy_fix import ProxyFix
-from translations import get_translation, get_companies, TRANSLATIONS
+from itsdangerous import URLSafeSerializer, BadSignature
+from translations import get_companies, TRANSLATIONS
+from room_catalog import RoomCatalog
+from booking_store import BookingStore
+from analytics import UtilizationStats, iso_week, is_late_cancellation
+from availability import availability_summary, date_range
+from user_registry import UserRegistry
+from status_scheduler import StatusScheduler
+from assets import load_manifest, DIST_DIR, IMMUTABLE_CACHE_CONTROL
+from request_context import RequestContext
+from ical_feed import CalendarFeeds
+from request_profiler import RequestProfiler, PROFILE_HEADER
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -14,81 +26,65 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-def load_rooms():
-    """Load rooms data from JSON file"""
-    try:
-        with open('data/rooms.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logging.error("Rooms data file not found")
-        return []
-
-def load_bookings():
-    """Load bookings data from JSON file"""
-    try:
-        with open('data/bookings.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logging.debug("Bookings file not found, creating empty bookings")
-        return []
-
-def save_bookings(bookings):
-    """Save bookings data to JSON file"""
-    try:
-        with open('data/bookings.json', 'w') as f:
-            json.dump(bookings, f, indent=2)
-        return True
-    except Exception as e:
-        logging.error(f"Error saving bookings: {e}")
-        return False
-
-def load_users():
-    """Load users data from JSON file"""
-    try:
-        with open('data/users.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logging.debug("Users file not found, creating empty users")
-        return {}
-
-def save_users(users):
-    """Save users data to JSON file"""
-    try:
-        with open('data/users.json', 'w') as f:
-            json.dump(users, f, indent=2)
-        return True
-    except Exception as e:
-        logging.error(f"Error saving users: {e}")
-        return False
+room_catalog = RoomCatalog('data/rooms.json')
+booking_store = BookingStore('data/bookings', room_catalog, legacy_path='data/bookings.json')
+utilization_stats = UtilizationStats(booking_store)
+user_registry = UserRegistry('data/users.db', legacy_path='data/users.json')
+status_scheduler = StatusScheduler(booking_store, room_catalog)
+asset_manifest = load_manifest(app.static_folder)
+calendar_feeds = CalendarFeeds(booking_store, room_catalog)
+
+# Opt-in request profiling: PROFILE_TOKEN enables the X-Profile header,
+# PROFILE_SAMPLE_RATE profiles that fraction of all requests
+request_profiler = RequestProfiler(os.environ.get('PROFILE_DIR', 'data/profiles'),
+                                   sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+                                   token=os.environ.get('PROFILE_TOKEN'))
+
+# Signs user identities into calendar feed URLs, which clients fetch without a session
+calendar_tokens = URLSafeSerializer(app.secret_key, salt='calendar-feed')
+
+# Longest date range served by the batch availability API
+MAX_AVAILABILITY_DAYS = 62
+
+def current_context():
+    """Get the context of the current request, creating it on first use"""
+    if 'context' not in g:
+        g.context = RequestContext(room_catalog, booking_store)
+    return g.context
+
+def registration_required(view):
+    """Redirect unregistered users to the registration page"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_context().is_registered:
+            return redirect(url_for('register'))
+        return view(*args, **kwargs)
+    return wrapped
+
+def has_overlap(bookings, start_time, end_time):
+    """Check if a time slot overlaps any of the given bookings"""
+    for booking in bookings:
+        # Check for time overlap
+        booking_start = datetime.strptime(booking['start_time'], '%H:%M').time()
+        booking_end = datetime.strptime(booking['end_time'], '%H:%M').time()
+        slot_start = datetime.strptime(start_time, '%H:%M').time()
+        slot_end = datetime.strptime(end_time, '%H:%M').time()
 
-def get_user_lang():
-    """Get user's preferred language"""
-    return session.get('lang', 'ru')
+        # Check if there's any overlap
+        if not (slot_end <= booking_start or slot_start >= booking_end):
+            return True
 
-def is_user_registered():
-    """Check if current user is registered"""
-    return 'user_name' in session and 'user_company' in session
+    return False
+
+def validate_slot(booking, others):
+    """Booking store validator rejecting slots that overlap other bookings"""
+    if has_overlap(others, booking['start_time'], booking['end_time']):
+        return 'room_unavailable'
+    return None
 
 def is_room_available(room_id, date, start_time, end_time):
     """Check if a room is available for the given time slot"""
-    bookings = load_bookings()
-
-    for booking in bookings:
-        if (booking['room_id'] == room_id and 
-            booking['date'] == date and
-            booking['status'] == 'confirmed'):
-
-            # Check for time overlap
-            booking_start = datetime.strptime(booking['start_time'], '%H:%M').time()
-            booking_end = datetime.strptime(booking['end_time'], '%H:%M').time()
-            slot_start = datetime.strptime(start_time, '%H:%M').time()
-            slot_end = datetime.strptime(end_time, '%H:%M').time()
-
-            # Check if there's any overlap
-            if not (slot_end <= booking_start or slot_start >= booking_end):
-                return False
-
-    return True
+    return not has_overlap(booking_store.for_room_date(room_id, date), start_time, end_time)
 
 def is_booking_time_valid(date, start_time, end_time):
     """Validate booking time restrictions"""
@@ -146,62 +142,44 @@ def is_booking_time_valid(date, start_time, end_time):
 
     return True, None
 
-def get_room_status(room_id):
-    """Get current status of a room (available/occupied)"""
-    from datetime import timezone, timedelta
-
-    # Use Kazakhstan time (UTC+5)
-    kz_timezone = timezone(timedelta(hours=5))
-    now = datetime.now(kz_timezone)
-    current_date = now.strftime('%Y-%m-%d')
-    current_time = now.time()
-
-    bookings = load_bookings()
-
-    logging.debug(f"Checking room {room_id} status at {current_time.strftime('%H:%M:%S')} on {current_date} (Kazakhstan time UTC+5)")
-
-    # Check all bookings for today
-    for booking in bookings:
-        if (booking['room_id'] == room_id and 
-            booking['date'] == current_date and
-            booking['status'] == 'confirmed'):
-
-            try:
-                # Parse booking times
-                booking_start = datetime.strptime(booking['start_time'], '%H:%M').time()
-                booking_end = datetime.strptime(booking['end_time'], '%H:%M').time()
-
-                logging.debug(f"Found booking {booking_start.strftime('%H:%M')} - {booking_end.strftime('%H:%M')} by {booking.get('user_name', 'Unknown')}")
-
-                # Convert times to minutes for easier comparison
-                current_minutes = current_time.hour * 60 + current_time.minute
-                start_minutes = booking_start.hour * 60 + booking_start.minute
-                end_minutes = booking_end.hour * 60 + booking_end.minute
-
-                # Check if current time is within booking period (inclusive of start, exclusive of end)
-                if start_minutes <= current_minutes < end_minutes:
-                    logging.debug(f"Room is OCCUPIED - Current time {current_time.strftime('%H:%M')} is within booking {booking_start.strftime('%H:%M')}-{booking_end.strftime('%H:%M')} by {booking.get('user_name', 'Unknown')}")
-                    return 'occupied'
-
-            except ValueError as e:
-                logging.error(f"Invalid time format in booking: {booking} - Error: {e}")
-                continue
-
-    logging.debug(f"Room is AVAILABLE - No active bookings at current time")
-    return 'available'
+def calendar_response(key, name):
+    """Serve a calendar feed with ETag and sync token support"""
+    body, etag, sync_token = calendar_feeds.feed(key, name, request.args.get('sync_token'))
+    response = app.response_class(body, mimetype='text/calendar')
+    response.set_etag(etag)
+    response.headers['X-Sync-Token'] = sync_token
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.template_global()
+def asset_url(filename):
+    """Get the URL of the fingerprinted build of a static asset"""
+    return url_for('static', filename=asset_manifest.get(filename, filename))
+
+@app.before_request
+def start_profiling():
+    """Start sampling the request if profiling was asked for"""
+    if request_profiler.enabled and request_profiler.wants(request.headers.get(PROFILE_HEADER)):
+        g.profile = request_profiler.start()
+
+@app.teardown_request
+def stop_profiling(exc):
+    """Merge the request's samples into its endpoint's collapsed-stack file"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        request_profiler.stop(profile, request.endpoint)
+
+@app.after_request
+def add_cache_headers(response):
+    """Let browsers cache fingerprinted assets without revalidation"""
+    if response.status_code == 200 and request.path.startswith(f"{app.static_url_path}/{DIST_DIR}/"):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
 
 @app.context_processor
 def inject_globals():
     """Inject global template variables"""
-    lang = get_user_lang()
-    return {
-        'get_translation': lambda key, default=None: get_translation(lang, key, default),
-        'lang': lang,
-        'companies': get_companies(),
-        'user_name': session.get('user_name'),
-        'user_company': session.get('user_company'),
-        'is_registered': is_user_registered()
-    }
+    return current_context().template_globals()
 
 @app.route('/set_language/<lang>')
 def set_language(lang):
@@ -221,14 +199,16 @@ def index():
         session['lang'] = 'ru'  # Default to Russian
 
     # Check if user is registered, if not redirect to registration
-    if not is_user_registered():
+    ctx = current_context()
+    if not ctx.is_registered:
         return redirect(url_for('register'))
 
-    rooms = load_rooms()
+    rooms = list(ctx.rooms.values())
+    room_statuses = status_scheduler.snapshot()
 
     # Add current status to each room
     for room in rooms:
-        room['current_status'] = get_room_status(room['id'])
+        room['current_status'] = room_statuses.get(room['id'], 'available')
 
     today = datetime.now().strftime('%Y-%m-%d')
     return render_template('index.html', rooms=rooms, today=today)
@@ -236,6 +216,7 @@ def index():
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     """User registration page"""
+    ctx = current_context()
     # Set default language if not selected
     if 'lang' not in session:
         session['lang'] = 'ru'  # Default to Russian
@@ -243,79 +224,64 @@ def register():
     if request.method == 'POST':
         name = request.form.get('name', '').strip()
         company = request.form.get('company', '').strip()
-        lang = session.get('lang', 'en')
 
         if not name:
-            flash(get_translation(lang, 'name_required'), 'error')
+            flash(ctx.translate('name_required'), 'error')
             return render_template('register.html')
 
         if not company:
-            flash(get_translation(lang, 'company_required'), 'error')
+            flash(ctx.translate('company_required'), 'error')
             return render_template('register.html')
 
         # Save user info to session
-        session['user_name'] = name
-        session['user_company'] = company
-
-        # Save to users database (optional for persistence)
-        users = load_users()
-        user_id = f"{name}_{company}_{datetime.now().timestamp()}"
-        users[user_id] = {
-            'name': name,
-            'company': company,
-            'registered_at': datetime.now().isoformat()
-        }
-        save_users(users)
+        ctx.set_user(name, company)
+
+        # Save to users registry (optional for persistence)
+        user_registry.register(name, company)
 
         return redirect(url_for('index'))
 
     return render_template('register.html')
 
 @app.route('/profile', methods=['GET', 'POST'])
+@registration_required
 def profile():
     """User profile page"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
-
+    ctx = current_context()
     if request.method == 'POST':
         name = request.form.get('name', '').strip()
         company = request.form.get('company', '').strip()
 
         if name and company:
-            session['user_name'] = name
-            session['user_company'] = company
-            flash(get_translation(get_user_lang(), 'profile_updated', 'Profile updated successfully'), 'success')
+            ctx.set_user(name, company)
+            user_registry.register(name, company)
+            flash(ctx.translate('profile_updated', 'Profile updated successfully'), 'success')
 
     return render_template('profile.html')
 
 @app.route('/book/<int:room_id>')
+@registration_required
 def book_room(room_id):
     """Room booking page"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
-
-    rooms = load_rooms()
-    room = next((r for r in rooms if r['id'] == room_id), None)
+    ctx = current_context()
+    room = ctx.room(room_id)
 
     if not room:
-        flash(get_translation(get_user_lang(), 'room_not_found', 'Room not found'), 'error')
+        flash(ctx.translate('room_not_found', 'Room not found'), 'error')
         return redirect(url_for('index'))
 
     today = datetime.now().strftime('%Y-%m-%d')
     return render_template('book_room.html', room=room, today=today)
 
 @app.route('/book/<int:room_id>', methods=['POST'])
+@registration_required
 def process_booking(room_id):
     """Process room booking form submission"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
-
-    rooms = load_rooms()
-    room = next((r for r in rooms if r['id'] == room_id), None)
-    lang = get_user_lang()
+    ctx = current_context()
+    room = ctx.room(room_id)
 
     if not room:
-        flash(get_translation(lang, 'room_not_found', 'Room not found'), 'error')
+        flash(ctx.translate('room_not_found', 'Room not found'), 'error')
         return redirect(url_for('index'))
 
     # Get form data
@@ -325,18 +291,18 @@ def process_booking(room_id):
     purpose = request.form.get('purpose', '')
 
     # Use session data for user info
-    user_name = session.get('user_name')
-    user_company = session.get('user_company')
+    user_name = ctx.user_name
+    user_company = ctx.user_company
 
     # Validate form data
     if not all([date, start_time, end_time]):
-        flash(get_translation(lang, 'fill_required_fields', 'Please fill in all required fields'), 'error')
+        flash(ctx.translate('fill_required_fields', 'Please fill in all required fields'), 'error')
         return render_template('book_room.html', room=room, today=datetime.now().strftime('%Y-%m-%d'))
 
     # Validate time restrictions
     time_valid, error_key = is_booking_time_valid(date, start_time, end_time)
     if not time_valid:
-        flash(get_translation(lang, error_key), 'error')
+        flash(ctx.translate(error_key), 'error')
         return render_template('book_room.html', room=room, today=datetime.now().strftime('%Y-%m-%d'))
 
     # Validate time range
@@ -345,18 +311,16 @@ def process_booking(room_id):
         end_dt = datetime.strptime(end_time, '%H:%M').time()
 
         if start_dt >= end_dt:
-            flash(get_translation(lang, 'invalid_time'), 'error')
+            flash(ctx.translate('invalid_time'), 'error')
             return render_template('book_room.html', room=room, today=datetime.now().strftime('%Y-%m-%d'))
 
     # Check availability
     if not is_room_available(room_id, date, start_time, end_time):
-        flash(get_translation(lang, 'room_unavailable'), 'error')
+        flash(ctx.translate('room_unavailable'), 'error')
         return render_template('book_room.html', room=room, today=datetime.now().strftime('%Y-%m-%d'))
 
     # Create booking
-    bookings = load_bookings()
     new_booking = {
-        'id': len(bookings) + 1,
         'room_id': room_id,
         'room_name': room['name'],
         'date': date,
@@ -369,14 +333,18 @@ def process_booking(room_id):
         'created_at': datetime.now().isoformat()
     }
 
-    bookings.append(new_booking)
+    # The slot is validated again at commit time in case another booking got in first
+    booking, error_key = booking_store.add(new_booking, validate=validate_slot)
 
-    if save_bookings(bookings):
-        flash(get_translation(lang, 'booking_successful'), 'success')
+    if booking:
+        flash(ctx.translate('booking_successful'), 'success')
         # Redirect to schedule to show the booking
         return redirect(url_for('room_schedule', room_id=room_id, date=date))
+    elif error_key == 'save_error':
+        flash(ctx.translate('booking_error'), 'error')
+        return render_template('book_room.html', room=room, today=datetime.now().strftime('%Y-%m-%d'))
     else:
-        flash(get_translation(lang, 'booking_error'), 'error')
+        flash(ctx.translate(error_key), 'error')
         return render_template('book_room.html', room=room, today=datetime.now().strftime('%Y-%m-%d'))
 
 @app.route('/api/room-availability/<int:room_id>')
@@ -386,8 +354,7 @@ def room_availability_api(room_id):
     if not date:
         return jsonify({'error': 'Date parameter required'}), 400
 
-    bookings = load_bookings()
-    room_bookings = [b for b in bookings if b['room_id'] == room_id and b['date'] == date and b['status'] == 'confirmed']
+    room_bookings = booking_store.for_room_date(room_id, date)
 
     occupied_slots = []
     for booking in room_bookings:
@@ -401,22 +368,18 @@ def room_availability_api(room_id):
     return jsonify({'occupied_slots': occupied_slots})
 
 @app.route('/schedule/<int:room_id>')
+@registration_required
 def room_schedule(room_id):
     """Show room schedule for a specific date"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
-
+    ctx = current_context()
     date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-    rooms = load_rooms()
-    room = next((r for r in rooms if r['id'] == room_id), None)
+    room = ctx.room(room_id)
 
     if not room:
-        flash(get_translation(get_user_lang(), 'room_not_found', 'Room not found'), 'error')
+        flash(ctx.translate('room_not_found', 'Room not found'), 'error')
         return redirect(url_for('index'))
 
-    bookings = load_bookings()
-    room_bookings = [b for b in bookings if b['room_id'] == room_id and b['date'] == date and b['status'] == 'confirmed']
-    room_bookings.sort(key=lambda x: x['start_time'])
+    room_bookings = booking_store.for_room_date(room_id, date)
 
     return render_template('schedule.html', room=room, bookings=room_bookings, selected_date=date)
 
@@ -424,123 +387,137 @@ def room_schedule(room_id):
 def api_room_schedule(room_id):
     """API endpoint for room schedule"""
     date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-    bookings = load_bookings()
-    room_bookings = [b for b in bookings if b['room_id'] == room_id and b['date'] == date and b['status'] == 'confirmed']
-    room_bookings.sort(key=lambda x: x['start_time'])
+    room_bookings = booking_store.for_room_date(room_id, date)
 
     return jsonify({'bookings': room_bookings})
 
+@app.route('/month')
+@registration_required
+def month_view():
+    """Show utilization of all rooms for every day of a month"""
+    ctx = current_context()
+    month = request.args.get('month', datetime.now().strftime('%Y-%m'))
+    try:
+        first_day = datetime.strptime(month, '%Y-%m').date()
+    except ValueError:
+        first_day = datetime.now().date().replace(day=1)
+        month = first_day.strftime('%Y-%m')
+
+    last_day = first_day.replace(day=calendar.monthrange(first_day.year, first_day.month)[1])
+    # No links past the first and last month datetime can represent
+    prev_month = (first_day - timedelta(days=1)).isoformat()[:7] if first_day > datetime.min.date() else None
+    next_month = (last_day + timedelta(days=1)).isoformat()[:7] if last_day < datetime.max.date() else None
+
+    rooms = list(ctx.rooms.values())
+    dates = date_range(first_day.isoformat(), last_day.isoformat())
+    room_ids = [room['id'] for room in rooms]
+    bookings = booking_store.between(dates[0], dates[-1], room_ids=room_ids)
+    summary = availability_summary(bookings, room_ids, dates)
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    return render_template('month.html', rooms=rooms, dates=dates, summary=summary, month=month,
+                           prev_month=prev_month, next_month=next_month, today=today)
+
+@app.route('/api/availability')
+def api_availability():
+    """API endpoint for batch availability of rooms over a date range"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    start = request.args.get('start', today)
+    end = request.args.get('end', start)
+    min_gap = request.args.get('min_gap', 1, type=int)
+
+    try:
+        days = (datetime.strptime(end, '%Y-%m-%d') - datetime.strptime(start, '%Y-%m-%d')).days
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+
+    # Check the span before building the date list so huge ranges cost nothing
+    if not 0 <= days < MAX_AVAILABILITY_DAYS:
+        return jsonify({'error': f'Date range must cover 1 to {MAX_AVAILABILITY_DAYS} days'}), 400
+
+    dates = date_range(start, end)
+
+    room_ids = request.args.getlist('room_id', type=int) or room_catalog.ids()
+    bookings = booking_store.between(dates[0], dates[-1], room_ids=room_ids)
+
+    return jsonify({
+        'start': dates[0],
+        'end': dates[-1],
+        'rooms': availability_summary(bookings, room_ids, dates, max(min_gap, 1))
+    })
+
 @app.route('/my-bookings')
+@registration_required
 def my_bookings():
     """Show user's bookings"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
-
-    user_name = session.get('user_name')
-    user_company = session.get('user_company')
-
-    bookings = load_bookings()
-    user_bookings = [b for b in bookings if b['user_name'] == user_name and b['user_company'] == user_company]
+    ctx = current_context()
+    user_bookings = list(ctx.user_bookings)
 
     # Sort by date and time
     user_bookings.sort(key=lambda x: (x['date'], x['start_time']))
 
     # Add room names
-    rooms = load_rooms()
-    room_names = {room['id']: room['name'] for room in rooms}
-
     for booking in user_bookings:
-        booking['room_name'] = room_names.get(booking['room_id'], f"Room {booking['room_id']}")
+        room = ctx.room(booking['room_id'])
+        booking['room_name'] = room['name'] if room else f"Room {booking['room_id']}"
 
     today = datetime.now().strftime('%Y-%m-%d')
-    return render_template('my_bookings.html', bookings=user_bookings, today=today)
+    calendar_url = url_for('user_calendar', token=calendar_tokens.dumps([ctx.user_name, ctx.user_company]),
+                           _external=True)
+    return render_template('my_bookings.html', bookings=user_bookings, today=today, calendar_url=calendar_url)
 
 @app.route('/delete-booking/<int:booking_id>', methods=['POST'])
+@registration_required
 def delete_booking(booking_id):
-    """Delete a booking"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
-
-    user_name = session.get('user_name')
-    user_company = session.get('user_company')
-
-    bookings = load_bookings()
-    booking_to_delete = None
-
-    for i, booking in enumerate(bookings):
-        if (booking['id'] == booking_id and 
-            booking['user_name'] == user_name and 
-            booking['user_company'] == user_company):
-            booking_to_delete = i
-            break
-
-    if booking_to_delete is not None:
-        deleted_booking = bookings.pop(booking_to_delete)
-        if save_bookings(bookings):
-            flash(get_translation(get_user_lang(), 'booking_deleted', 'Booking deleted successfully'), 'success')
+    """Delete a booking, keeping late cancellations as cancelled bookings"""
+    ctx = current_context()
+    booking = ctx.user_booking(booking_id)
+    if booking is not None:
+        now = datetime.now()
+        if is_late_cancellation(booking, now):
+            cancelled, _ = booking_store.update(booking_id, {'status': 'cancelled', 'cancelled_at': now.isoformat()},
+                                                expected_version=booking.get('version', 1))
+            deleted = cancelled is not None
+        else:
+            deleted = booking_store.delete(booking_id) is not None
+        if deleted:
+            flash(ctx.translate('booking_deleted', 'Booking deleted successfully'), 'success')
         else:
-            flash(get_translation(get_user_lang(), 'delete_error', 'Error deleting booking'), 'error')
+            flash(ctx.translate('delete_error', 'Error deleting booking'), 'error')
     else:
-        flash(get_translation(get_user_lang(), 'booking_not_found', 'Booking not found'), 'error')
+        flash(ctx.translate('booking_not_found', 'Booking not found'), 'error')
 
     return redirect(url_for('my_bookings'))
 
 @app.route('/edit-booking/<int:booking_id>')
+@registration_required
 def edit_booking(booking_id):
     """Edit booking page"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
-
-    user_name = session.get('user_name')
-    user_company = session.get('user_company')
-
-    bookings = load_bookings()
-    booking = None
-
-    for b in bookings:
-        if (b['id'] == booking_id and 
-            b['user_name'] == user_name and 
-            b['user_company'] == user_company):
-            booking = b
-            break
+    ctx = current_context()
+    booking = ctx.user_booking(booking_id)
 
     if not booking:
-        flash(get_translation(get_user_lang(), 'booking_not_found', 'Booking not found'), 'error')
+        flash(ctx.translate('booking_not_found', 'Booking not found'), 'error')
         return redirect(url_for('my_bookings'))
 
-    rooms = load_rooms()
-    room = next((r for r in rooms if r['id'] == booking['room_id']), None)
+    room = ctx.room(booking['room_id'])
 
     if not room:
-        flash(get_translation(get_user_lang(), 'room_not_found', 'Room not found'), 'error')
+        flash(ctx.translate('room_not_found', 'Room not found'), 'error')
         return redirect(url_for('my_bookings'))
 
     return render_template('edit_booking.html', booking=booking, room=room)
 
 @app.route('/edit-booking/<int:booking_id>', methods=['POST'])
+@registration_required
 def update_booking(booking_id):
     """Update booking"""
-    if not is_user_registered():
-        return redirect(url_for('register'))
+    ctx = current_context()
 
-    user_name = session.get('user_name')
-    user_company = session.get('user_company')
-    lang = get_user_lang()
+    original_booking = ctx.user_booking(booking_id)
 
-    bookings = load_bookings()
-    booking_index = None
-    original_booking = None
-
-    for i, b in enumerate(bookings):
-        if (b['id'] == booking_id and 
-            b['user_name'] == user_name and 
-            b['user_company'] == user_company):
-            booking_index = i
-            original_booking = b
-            break
-
-    if booking_index is None:
-        flash(get_translation(lang, 'booking_not_found', 'Booking not found'), 'error')
+    if original_booking is None:
+        flash(ctx.translate('booking_not_found', 'Booking not found'), 'error')
         return redirect(url_for('my_bookings'))
 
     # Get form data
@@ -548,74 +525,110 @@ def update_booking(booking_id):
     start_time = request.form.get('start_time')
     end_time = request.form.get('end_time')
     purpose = request.form.get('purpose', '')
+    version = request.form.get('version', type=int)
 
     # Validate form data
     if not all([date, start_time, end_time]):
-        flash(get_translation(lang, 'fill_required_fields', 'Please fill in all required fields'), 'error')
+        flash(ctx.translate('fill_required_fields', 'Please fill in all required fields'), 'error')
         return redirect(url_for('edit_booking', booking_id=booking_id))
 
     # Validate time restrictions
     time_valid, error_key = is_booking_time_valid(date, start_time, end_time)
     if not time_valid:
-        flash(get_translation(lang, error_key), 'error')
+        flash(ctx.translate(error_key), 'error')
         return redirect(url_for('edit_booking', booking_id=booking_id))
 
     # Validate time range
     if start_time >= end_time:
-        flash(get_translation(lang, 'invalid_time'), 'error')
+        flash(ctx.translate('invalid_time'), 'error')
         return redirect(url_for('edit_booking', booking_id=booking_id))
 
-    # Check availability (exclude current booking)
-    temp_bookings = [b for b in bookings if b['id'] != booking_id]
-    room_id = original_booking['room_id']
-
-    for booking in temp_bookings:
-        if (booking['room_id'] == room_id and 
-            booking['date'] == date and
-            booking['status'] == 'confirmed'):
-
-            # Check for time overlap
-            booking_start = datetime.strptime(booking['start_time'], '%H:%M').time()
-            booking_end = datetime.strptime(booking['end_time'], '%H:%M').time()
-            slot_start = datetime.strptime(start_time, '%H:%M').time()
-            slot_end = datetime.strptime(end_time, '%H:%M').time()
-
-            if not (slot_end <= booking_start or slot_start >= booking_end):
-                flash(get_translation(lang, 'room_unavailable'), 'error')
-                return redirect(url_for('edit_booking', booking_id=booking_id))
-
-    # Update booking
-    bookings[booking_index].update({
+    # Update booking; availability (excluding this booking) is checked at commit time
+    updated, error_key = booking_store.update(booking_id, {
         'date': date,
         'start_time': start_time,
         'end_time': end_time,
         'purpose': purpose,
         'updated_at': datetime.now().isoformat()
-    })
+    }, validate=validate_slot, expected_version=version)
 
-    if save_bookings(bookings):
-        flash(get_translation(lang, 'booking_updated', 'Booking updated successfully'), 'success')
+    if updated:
+        flash(ctx.translate('booking_updated', 'Booking updated successfully'), 'success')
         return redirect(url_for('my_bookings'))
+    elif error_key == 'save_error':
+        flash(ctx.translate('update_error', 'Error updating booking'), 'error')
+        return redirect(url_for('edit_booking', booking_id=booking_id))
     else:
-        flash(get_translation(lang, 'update_error', 'Error updating booking'), 'error')
+        flash(ctx.translate(error_key), 'error')
         return redirect(url_for('edit_booking', booking_id=booking_id))
 
+@app.route('/api/rooms')
+def api_rooms():
+    """API endpoint for searching rooms by capacity, features and location"""
+    min_capacity = request.args.get('min_capacity', type=int)
+    features = request.args.getlist('feature')
+    location = request.args.get('location')
+
+    rooms = room_catalog.search(min_capacity=min_capacity, features=features, location=location)
+    return jsonify({'rooms': rooms})
+
+@app.route('/api/stats/rooms')
+def api_stats_rooms():
+    """API endpoint for booked minutes and utilization per room on a date"""
+    date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+    return jsonify({
+        'date': date,
+        'rooms': utilization_stats.room_utilization(room_catalog.ids(), date)
+    })
+
+@app.route('/api/stats/rooms/<int:room_id>/hours')
+def api_stats_room_hours(room_id):
+    """API endpoint for booked minutes per weekday and hour for a room"""
+    return jsonify({'room_id': room_id, 'weekdays': utilization_stats.room_hours(room_id)})
+
+@app.route('/api/stats/companies')
+def api_stats_companies():
+    """API endpoint for booked minutes per company in an ISO week"""
+    week = request.args.get('week') or iso_week(datetime.now().strftime('%Y-%m-%d'))
+    companies = [c['id'] for c in get_companies()]
+    return jsonify({'week': week, 'companies': utilization_stats.company_week_minutes(companies, week)})
+
+@app.route('/api/stats/late-cancellations')
+def api_stats_late_cancellations():
+    """API endpoint for bookings cancelled shortly before or after their start"""
+    return jsonify({'cancellations': utilization_stats.late_cancellations()})
+
 @app.route('/api/room-status')
 def api_room_status():
     """API endpoint for getting all room statuses"""
-    rooms = load_rooms()
-    room_statuses = {}
+    room_statuses = status_scheduler.snapshot()
+    return jsonify({room_id: room_statuses.get(room_id, 'available') for room_id in room_catalog.ids()})
 
-    for room in rooms:
-        room_statuses[room['id']] = get_room_status(room['id'])
+@app.route('/calendar/user/<token>.ics')
+def user_calendar(token):
+    """iCalendar feed of a user's bookings"""
+    try:
+        user_name, user_company = calendar_tokens.loads(token)
+    except (BadSignature, ValueError):
+        return jsonify({'error': 'Invalid calendar token'}), 404
+
+    return calendar_response(('user', user_name, user_company), f"{user_name} - {user_company}")
+
+@app.route('/calendar/room/<int:room_id>.ics')
+def room_calendar(room_id):
+    """iCalendar feed of a room's bookings"""
+    room = room_catalog.get(room_id)
+    if not room:
+        return jsonify({'error': 'Room not found'}), 404
 
-    return jsonify(room_statuses)
+    return calendar_response(('room', room_id), room['name'])
 
 @app.route('/logout')
 def logout():
     """Logout user and clear session"""
+    ctx = current_context()
     session.clear()
-    flash(get_translation(get_user_lang(), 'logout_successful', 'You have been logged out successfully'), 'success')
+    flash(ctx.translate('logout_successful', 'You have been logged out successfully'), 'success')
     return redirect(url_for('register'))
 
 if __name__ == '__main__':
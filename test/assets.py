@@ -0,0 +1,299 @@
+import os
+import re
+import json
+import sys
+import zlib
+import struct
+import hashlib
+import tempfile
+import logging
+
+# Source files, relative to the static folder, that are fingerprinted into DIST_DIR
+ASSET_GLOBS = {
+    'css': ('.css',),
+    'js': ('.js',),
+    'images': ('.png',),
+}
+
+DIST_DIR = 'dist'
+
+# Written into DIST_DIR by build_assets() and read by the app with load_manifest()
+MANIFEST_NAME = 'manifest.json'
+
+# Fingerprinted files never change, so browsers may cache them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Chunks that affect how the image is decoded or displayed
+PNG_KEEP_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'IEND'}
+
+
+# Strings, url() and comments are matched whole so their content is never minified
+CSS_TOKEN = re.compile(r"""
+    (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<url>url\(\s*(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[^)]*)\s*\))
+  | (?P<comment>/\*.*?(?:\*/|\Z))
+  | (?P<space>\s+)
+  | (?P<punct>[{};,>])
+  | (?P<colon>:)
+  | (?P<other>[\w-]+|.)
+""", re.S | re.X | re.I)
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet.
+
+    Whitespace is dropped around '{', '}', ';', ',' and '>' and after ':',
+    but kept before ':' so descendant pseudo-class selectors such as
+    '.a :hover' keep their meaning. Strings and url() are copied verbatim.
+    """
+    out = []
+    space = False
+    for match in CSS_TOKEN.finditer(source):
+        kind, token = match.lastgroup, match.group()
+        if kind == 'comment':
+            continue
+        if kind == 'space':
+            space = True
+            continue
+        if kind == 'punct':
+            if token == '}' and out and out[-1] == ';':
+                out.pop()
+        elif space and out and out[-1] not in ('{', '}', ';', ',', '>', ':'):
+            out.append(' ')
+        out.append(token)
+        space = False
+    return ''.join(out)
+
+
+def minify_js(source):
+    """Strip comment-only lines, indentation and blank lines from a script.
+
+    This is deliberately conservative: code is never joined across lines
+    and comments after code are kept, so semicolon-less statements are
+    left intact. Strings, template literals and block comments are tracked
+    across lines, so a line is only dropped when it holds nothing but
+    comments, and lines inside template literals are kept verbatim.
+    """
+    lines = []
+    # None, a quote character, 'comment' (dropped) or 'kept_comment' (after code)
+    state = None
+    for line in source.splitlines():
+        started_in_template = state == '`'
+        code_start = 0 if started_in_template or state == 'kept_comment' else None
+        i = 0
+        while i < len(line):
+            if state in ('comment', 'kept_comment'):
+                end = line.find('*/', i)
+                i = len(line) if end < 0 else end + 2
+                if end >= 0:
+                    state = None
+                continue
+            char = line[i]
+            if state is not None:
+                if char == '\\':
+                    i += 2
+                    continue
+                if char == state:
+                    state = None
+                i += 1
+                continue
+            if char.isspace():
+                i += 1
+                continue
+            if line.startswith('//', i):
+                break
+            if line.startswith('/*', i):
+                state = 'comment' if code_start is None else 'kept_comment'
+                i += 2
+                continue
+            if code_start is None:
+                code_start = i
+            if char in '\'"`':
+                state = char
+            i += 1
+
+        if state in ('\'', '"'):
+            # Unterminated quotes end with the line
+            state = None
+        if code_start is None:
+            continue
+        text = line[code_start:] if started_in_template else line[code_start:].lstrip()
+        lines.append(text if state == '`' else text.rstrip())
+    return '\n'.join(lines) + '\n'
+
+
+def optimize_png(data):
+    """Recompress a PNG at maximum zlib level and drop metadata chunks.
+
+    Returns the original bytes if the file is not a PNG or the result is
+    not smaller.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        return data
+
+    chunks = []
+    idat = []
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if chunk_type == b'IDAT':
+            if not idat:
+                chunks.append((b'IDAT', None))
+            idat.append(body)
+        elif chunk_type in PNG_KEEP_CHUNKS:
+            chunks.append((chunk_type, body))
+
+    try:
+        pixels = zlib.decompress(b''.join(idat))
+    except zlib.error as e:
+        logging.error(f"Cannot optimize PNG: {e}")
+        return data
+
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9)
+    compressed = compressor.compress(pixels) + compressor.flush()
+
+    out = [PNG_SIGNATURE]
+    for chunk_type, body in chunks:
+        if body is None:
+            body = compressed
+        out.append(struct.pack('>I', len(body)) + chunk_type + body +
+                   struct.pack('>I', zlib.crc32(chunk_type + body) & 0xffffffff))
+    result = b''.join(out)
+    return result if len(result) < len(data) else data
+
+
+def process(path, data):
+    """Minify or optimize an asset based on its extension"""
+    if path.endswith('.css'):
+        return minify_css(data.decode('utf-8')).encode('utf-8')
+    if path.endswith('.js'):
+        return minify_js(data.decode('utf-8')).encode('utf-8')
+    if path.endswith('.png'):
+        return optimize_png(data)
+    return data
+
+
+def write_atomic(path, data):
+    """Write a file so other workers never see it half-written"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_manifest(static_folder):
+    """Read the manifest written by build_assets(), or {} if assets were not built"""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logging.warning(f"No asset manifest at {path}, serving unfingerprinted assets")
+    except (OSError, ValueError) as e:
+        logging.error(f"Error loading asset manifest {path}: {e}")
+    return {}
+
+
+def prune_assets(static_folder, keep):
+    """Delete built files under static/dist that are not in ``keep``"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    for dirpath, _, filenames in os.walk(dist):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            if rel_path in keep or filename == MANIFEST_NAME:
+                continue
+            try:
+                os.remove(path)
+                logging.debug(f"Pruned stale asset {rel_path}")
+            except OSError as e:
+                logging.error(f"Error pruning asset {rel_path}: {e}")
+
+
+def build_assets(static_folder):
+    """Minify and fingerprint static assets into static/dist.
+
+    Run once per deploy (``python assets.py``), before the workers start;
+    they only read the result with load_manifest(). Writes and returns a
+    manifest mapping source paths (e.g. 'css/custom.css') to fingerprinted
+    paths (e.g. 'dist/css/custom.3f9a1c2b7d.css'), both relative to the
+    static folder. Unchanged assets are not rewritten. Files of the
+    previous build are kept so pages rendered by workers that are still
+    running can load them; older builds are deleted.
+    """
+    manifest_path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    previous = load_manifest(static_folder) if os.path.exists(manifest_path) else {}
+    manifest = {}
+    for directory, extensions in ASSET_GLOBS.items():
+        root = os.path.join(static_folder, directory)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if not filename.endswith(extensions):
+                    continue
+                source = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(source, static_folder).replace(os.sep, '/')
+                try:
+                    with open(source, 'rb') as f:
+                        data = process(rel_path, f.read())
+                except (OSError, UnicodeDecodeError) as e:
+                    logging.error(f"Error building asset {rel_path}: {e}")
+                    continue
+
+                digest = hashlib.sha256(data).hexdigest()[:10]
+                base, ext = os.path.splitext(rel_path)
+                dist_path = f"{DIST_DIR}/{base}.{digest}{ext}"
+                target = os.path.join(static_folder, dist_path)
+                if not os.path.exists(target):
+                    try:
+                        write_atomic(target, data)
+                    except OSError as e:
+                        # Unlisted assets are served from their unfingerprinted path
+                        logging.error(f"Error writing asset {dist_path}: {e}")
+                        continue
+                manifest[rel_path] = dist_path
+
+    try:
+        write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    except OSError as e:
+        logging.error(f"Error writing asset manifest {manifest_path}: {e}")
+        return manifest
+
+    prune_assets(static_folder, set(manifest.values()) | set(previous.values()))
+    logging.debug(f"Built {len(manifest)} static assets")
+    return manifest
+
+
+def optimize_images_in_place(paths):
+    """Optimize PNG files in the given directories, keeping file names"""
+    for directory in paths:
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.png'):
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            optimized = optimize_png(data)
+            if len(optimized) < len(data):
+                write_atomic(path, optimized)
+            print(f"{path}: {len(data)} -> {len(optimized)} bytes")
+
+
+if __name__ == '__main__':
+    if '--optimize-images' in sys.argv:
+        optimize_images_in_place(['static/images', 'attached_assets'])
+    else:
+        for source, target in sorted(build_assets('static').items()):
+            print(f"{source} -> {target}")
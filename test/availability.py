@@ -0,0 +1,105 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from booking_store import time_to_minutes
+
+# Working hours are 9:00 - 18:00, one column per minute
+DAY_START = 9 * 60
+DAY_END = 18 * 60
+DAY_MINUTES = DAY_END - DAY_START
+
+BookingArrays = namedtuple('BookingArrays', ['room_ids', 'dates', 'room_idx', 'day_idx', 'start', 'end'])
+
+
+def date_range(start_date, end_date):
+    """Get all 'YYYY-MM-DD' dates from start_date to end_date inclusive"""
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+def minutes_to_time(minutes):
+    """Convert minutes since midnight to an 'HH:MM' string"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def load_arrays(bookings, room_ids, dates):
+    """Pack bookings into parallel arrays of room index, day index and start/end minute.
+
+    Bookings for rooms or dates outside the given ones are dropped, and
+    times are clipped to working hours relative to DAY_START.
+    """
+    room_pos = {room_id: i for i, room_id in enumerate(room_ids)}
+    day_pos = {date: i for i, date in enumerate(dates)}
+
+    rows = []
+    for booking in bookings:
+        room = room_pos.get(booking['room_id'])
+        day = day_pos.get(booking['date'])
+        if room is None or day is None:
+            continue
+        try:
+            rows.append((room, day, time_to_minutes(booking['start_time']), time_to_minutes(booking['end_time'])))
+        except (KeyError, ValueError):
+            continue
+
+    data = np.array(rows, dtype=np.int32).reshape(-1, 4)
+    start = np.clip(data[:, 2] - DAY_START, 0, DAY_MINUTES)
+    end = np.clip(data[:, 3] - DAY_START, 0, DAY_MINUTES)
+    return BookingArrays(list(room_ids), list(dates), data[:, 0], data[:, 1], start, end)
+
+
+def occupancy_matrix(arrays):
+    """Get a (rooms, days, minutes) boolean matrix of occupied working minutes"""
+    shape = (len(arrays.room_ids), len(arrays.dates), DAY_MINUTES + 1)
+    delta = np.zeros(shape, dtype=np.int16)
+    valid = arrays.end > arrays.start
+    room_idx = arrays.room_idx[valid]
+    day_idx = arrays.day_idx[valid]
+    np.add.at(delta, (room_idx, day_idx, arrays.start[valid]), 1)
+    np.add.at(delta, (room_idx, day_idx, arrays.end[valid]), -1)
+    return np.cumsum(delta, axis=2)[:, :, :DAY_MINUTES] > 0
+
+
+def utilization(occupied):
+    """Get the occupied share of working hours per (room, day)"""
+    return occupied.mean(axis=2)
+
+
+def free_gaps(occupied, min_minutes=1):
+    """Find free intervals as arrays of room index, day index, start and end minute.
+
+    Minutes are absolute (minutes since midnight). Gaps shorter than
+    min_minutes are dropped.
+    """
+    free = ~occupied
+    padded = np.zeros(free.shape[:2] + (free.shape[2] + 2,), dtype=np.int8)
+    padded[:, :, 1:-1] = free
+    edges = np.diff(padded, axis=2)
+
+    # argwhere walks in row-major order, so the n-th rising edge pairs with the n-th falling edge
+    starts = np.argwhere(edges == 1)
+    ends = np.argwhere(edges == -1)[:, 2]
+    keep = (ends - starts[:, 2]) >= min_minutes
+    starts = starts[keep]
+    return starts[:, 0], starts[:, 1], starts[:, 2] + DAY_START, ends[keep] + DAY_START
+
+
+def availability_summary(bookings, room_ids, dates, min_gap=1):
+    """Compute utilization and free gaps for every room and date.
+
+    Returns {room_id: {date: {'utilization': float, 'free': [[start, end], ...]}}}.
+    """
+    arrays = load_arrays(bookings, room_ids, dates)
+    occupied = occupancy_matrix(arrays)
+    usage = utilization(occupied)
+
+    result = {
+        room_id: {date: {'utilization': round(float(usage[r, d]), 4), 'free': []} for d, date in enumerate(dates)}
+        for r, room_id in enumerate(room_ids)
+    }
+    for r, d, start, end in zip(*(a.tolist() for a in free_gaps(occupied, min_gap))):
+        result[room_ids[r]][dates[d]]['free'].append([minutes_to_time(start), minutes_to_time(end)])
+    return result
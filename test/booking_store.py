@@ -0,0 +1,606 @@
+import os
+import re
+import json
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+
+# Attempts at an optimistic commit before giving up with 'booking_conflict'
+MAX_COMMIT_RETRIES = 3
+
+# Booking ids are seq * SHARD_ID_STRIDE + shard number, so the shard of a
+# booking can be found from its id without opening other shards
+SHARD_ID_STRIDE = 1000
+
+DEFAULT_SHARD = 'default'
+
+# Deleted bookings remembered per shard for incremental sync (see changes_since())
+MAX_TOMBSTONES = 1000
+
+
+def time_to_minutes(value):
+    """Convert an 'HH:MM' string to minutes since midnight"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def shard_key(location):
+    """Get a file-safe shard key for a room location"""
+    key = re.sub(r'\W+', '-', str(location or '').casefold()).strip('-')
+    return key or DEFAULT_SHARD
+
+
+def file_signature(path):
+    """Get (mtime_ns, size, inode) of a file, or None if it does not exist.
+
+    Writes replace files atomically, so the inode changes even when two
+    writes land within the same mtime tick.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on a lock file, shared by threads and worker processes"""
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        # Closing the file releases the lock
+        yield
+
+
+def _write_json(path, data):
+    """Atomically write JSON to a file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class BookingShard:
+    """Cached access to one shard file of bookings.
+
+    Bookings are kept in memory and indexed by id and by (room_id, date).
+    The file is reloaded when its signature (see file_signature()) changes,
+    e.g. after a write from another worker. Every mutation bumps
+    ``version`` and is reported through ``on_event(event, old, new)`` where
+    event is 'add', 'update', 'delete' or 'reload'.
+
+    The file holds ``{'next_seq', 'revision', 'bookings', 'deleted',
+    'deleted_floor'}``. ``next_seq`` only ever grows, so ids of deleted
+    bookings are never handed out again. ``revision`` is bumped by every
+    commit and stamped on the written booking, and deleted bookings leave a
+    tombstone in ``deleted``, so changes_since() can list what changed
+    after any earlier revision. Files holding a plain list of bookings are
+    still read.
+
+    Commits to one shard are serialized by the shard's lock file, across
+    threads and worker processes; commits to different shards (locations)
+    run in parallel. Validation (e.g. overlap checks) runs outside the lock
+    against a snapshot of the touched (room_id, date) partitions, taken as
+    the (id, version) pairs of their bookings. The commit reloads the file
+    under the lock and succeeds only if those partitions are unchanged,
+    retrying otherwise. Readers never wait for a write to reach the disk.
+    """
+
+    def __init__(self, path, number, on_event):
+        self.path = path
+        self.number = number
+        self.version = 0
+        self._lock = threading.RLock()
+        self._signature = None
+        self._bookings = {}
+        self._by_room_date = {}
+        self._next_seq = 1
+        self._revision = 0
+        self._deleted = []
+        self._deleted_floor = 0
+        self._notify = on_event
+
+    def _index(self, bookings):
+        by_room_date = {}
+        for booking in bookings.values():
+            key = (booking['room_id'], booking['date'])
+            by_room_date.setdefault(key, set()).add(booking['id'])
+        return by_room_date
+
+    def _load(self):
+        """Reload bookings from disk if the file changed"""
+        signature = file_signature(self.path)
+        if signature == self._signature and self.version:
+            return
+
+        data = {}
+        if signature is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.error(f"Error loading bookings: {e}")
+                return
+        else:
+            logging.debug("Bookings file not found, creating empty bookings")
+
+        if isinstance(data, list):
+            data = {'bookings': data}
+        bookings = {b['id']: b for b in data.get('bookings', [])}
+        data['next_seq'] = max(data.get('next_seq', 1), max((i // SHARD_ID_STRIDE for i in bookings), default=0) + 1)
+        self._install(bookings, data, signature)
+        self._notify('reload', None, None)
+
+    def _install(self, bookings, meta, signature):
+        self._bookings = bookings
+        self._by_room_date = self._index(bookings)
+        self._next_seq = meta['next_seq']
+        self._revision = meta.get('revision', 0)
+        self._deleted = meta.get('deleted', [])
+        self._deleted_floor = meta.get('deleted_floor', 0)
+        self._signature = signature
+        self.version += 1
+
+    def refresh(self):
+        """Reload bookings if the shard file changed on disk"""
+        with self._lock:
+            self._load()
+
+    def all(self):
+        """Get copies of all bookings"""
+        with self._lock:
+            self._load()
+            return [dict(b) for b in self._bookings.values()]
+
+    def get(self, booking_id):
+        """Get a copy of a booking by id, or None"""
+        with self._lock:
+            self._load()
+            booking = self._bookings.get(booking_id)
+            return dict(booking) if booking else None
+
+    def for_room_date(self, room_id, date, status='confirmed'):
+        """Get copies of a room's bookings on a date, sorted by start time"""
+        with self._lock:
+            self._load()
+            ids = self._by_room_date.get((room_id, date), ())
+            bookings = [dict(self._bookings[i]) for i in ids]
+        if status:
+            bookings = [b for b in bookings if b['status'] == status]
+        bookings.sort(key=lambda b: b['start_time'])
+        return bookings
+
+    def between(self, start_date, end_date, status='confirmed'):
+        """Get copies of bookings dated from start_date to end_date inclusive"""
+        with self._lock:
+            self._load()
+            return [dict(b) for b in self._bookings.values()
+                    if start_date <= b['date'] <= end_date and (not status or b['status'] == status)]
+
+    def revision(self):
+        """Get the revision of the shard file"""
+        with self._lock:
+            self._load()
+            return self._revision
+
+    def changes_since(self, revision):
+        """Get (bookings, tombstones) written after a revision.
+
+        Returns None if the revision is unknown or so old that some of its
+        tombstones were already dropped.
+        """
+        with self._lock:
+            self._load()
+            if revision > self._revision or revision < self._deleted_floor:
+                return None
+            bookings = [dict(b) for b in self._bookings.values() if b.get('revision', 0) > revision]
+            tombstones = [dict(t) for t in self._deleted if t['revision'] > revision]
+        return bookings, tombstones
+
+    def _tokens(self, keys):
+        """Get the current token of each (room_id, date) partition.
+
+        A token is the set of (id, version) pairs of the partition's
+        bookings, so it changes whenever a booking enters, leaves or
+        changes in the partition, whichever worker wrote it.
+        """
+        with self._lock:
+            self._load()
+            return {key: frozenset((i, self._bookings[i].get('version', 1))
+                                   for i in self._by_room_date.get(key, ()))
+                    for key in keys}
+
+    def _commit(self, tokens, booking_id, expected_version, new_booking):
+        """Compare-and-swap a single booking.
+
+        Holds the shard's lock file, reloads the file, checks that neither
+        the partitions in ``tokens`` nor the booking changed since the
+        snapshot, then writes ``new_booking`` (None deletes). A booking_id
+        of None assigns the next id from ``next_seq``. Returns
+        (old, new, error) where error is 'conflict' if the caller should
+        retry.
+        """
+        with file_lock(f"{self.path}.lock"):
+            with self._lock:
+                if self._tokens(tokens) != tokens:
+                    return None, None, 'conflict'
+
+                meta = {
+                    'next_seq': self._next_seq,
+                    'revision': self._revision + 1,
+                    'deleted': list(self._deleted),
+                    'deleted_floor': self._deleted_floor
+                }
+                if booking_id is None:
+                    booking_id = meta['next_seq'] * SHARD_ID_STRIDE + self.number
+                    meta['next_seq'] += 1
+                    new_booking = dict(new_booking, id=booking_id)
+                old = self._bookings.get(booking_id)
+                if expected_version is not None and (old is None or old.get('version', 1) != expected_version):
+                    return None, None, 'conflict'
+
+                bookings = dict(self._bookings)
+                if new_booking is None:
+                    del bookings[booking_id]
+                    meta['deleted'].append({
+                        'id': booking_id,
+                        'room_id': old['room_id'],
+                        'user_name': old.get('user_name'),
+                        'user_company': old.get('user_company'),
+                        'revision': meta['revision']
+                    })
+                    if len(meta['deleted']) > MAX_TOMBSTONES:
+                        meta['deleted_floor'] = meta['deleted'].pop(0)['revision']
+                else:
+                    new_booking = dict(new_booking, revision=meta['revision'])
+                    bookings[booking_id] = new_booking
+
+            # Other writers of this shard wait on the lock file, readers keep using memory
+            try:
+                _write_json(self.path, dict(meta, bookings=list(bookings.values())))
+            except Exception as e:
+                logging.error(f"Error saving bookings: {e}")
+                return None, None, 'save_error'
+
+            with self._lock:
+                self._install(bookings, meta, file_signature(self.path))
+
+        return old, new_booking, None
+
+    def add(self, booking, validate=None):
+        """Assign an id to a new booking and persist it.
+
+        ``validate(booking, others)`` receives the other bookings in the
+        target partition and returns an error key to reject the booking.
+        Returns (booking, error_key).
+        """
+        key = (booking['room_id'], booking['date'])
+        for _ in range(MAX_COMMIT_RETRIES):
+            tokens = self._tokens([key])
+            if validate:
+                error = validate(booking, self.for_room_date(*key))
+                if error:
+                    return None, error
+
+            _, new, error = self._commit(tokens, None, None, dict(booking, version=1))
+            if error == 'conflict':
+                continue
+            if error:
+                return None, error
+            self._notify('add', None, dict(new))
+            return dict(new), None
+
+        return None, 'booking_conflict'
+
+    def update(self, booking_id, changes, validate=None, expected_version=None):
+        """Apply changes to a booking and persist it.
+
+        ``expected_version`` rejects the update with 'booking_modified' if
+        the booking changed since the caller read it. ``validate`` works as
+        in add(). Returns (booking, error_key).
+        """
+        for _ in range(MAX_COMMIT_RETRIES):
+            current = self.get(booking_id)
+            if current is None:
+                return None, 'booking_not_found'
+            version = current.get('version', 1)
+            if expected_version is not None and version != expected_version:
+                return None, 'booking_modified'
+
+            new_booking = dict(current, **changes)
+            new_booking['version'] = version + 1
+            key = (new_booking['room_id'], new_booking['date'])
+            tokens = self._tokens({(current['room_id'], current['date']), key})
+
+            if validate:
+                others = [b for b in self.for_room_date(*key) if b['id'] != booking_id]
+                error = validate(new_booking, others)
+                if error:
+                    return None, error
+
+            old, new, error = self._commit(tokens, booking_id, version, new_booking)
+            if error == 'conflict':
+                continue
+            if error:
+                return None, error
+            self._notify('update', dict(old), dict(new))
+            return dict(new), None
+
+        return None, 'booking_conflict'
+
+    def delete(self, booking_id):
+        """Remove a booking and persist the change"""
+        for _ in range(MAX_COMMIT_RETRIES):
+            current = self.get(booking_id)
+            if current is None:
+                return None
+            tokens = self._tokens([(current['room_id'], current['date'])])
+            old, _, error = self._commit(tokens, booking_id, current.get('version', 1), None)
+            if error == 'conflict':
+                continue
+            if error:
+                return None
+            self._notify('delete', dict(old), None)
+            return dict(old)
+
+        return None
+
+
+class BookingStore:
+    """Bookings partitioned into per-location shard files.
+
+    Each room location (e.g. a floor) gets its own shard file in
+    ``directory`` and its own BookingShard with separate locks, so requests
+    only open the shards of the rooms they touch and writes to different
+    locations never wait on each other. ``shards.json`` records the shard
+    number of each location and the shard each room was assigned to; booking
+    ids encode the shard number (see SHARD_ID_STRIDE).
+
+    Subscribers registered with subscribe() receive the events of every
+    shard. On first use, bookings from ``legacy_path`` are split into shards
+    and renumbered, keeping their old id as ``legacy_id``. Changes to
+    ``shards.json`` are made under ``shards.lock`` so workers never assign
+    the same shard number twice.
+    """
+
+    def __init__(self, directory, catalog, legacy_path=None):
+        self.directory = directory
+        self.catalog = catalog
+        self.legacy_path = legacy_path
+        self._registry_path = os.path.join(directory, 'shards.json')
+        self._registry_lock_path = os.path.join(directory, 'shards.lock')
+        self._migrated_marker_path = os.path.join(directory, 'legacy-migrated')
+        self._registry_signature = None
+        self._registry = {'shards': {}, 'rooms': {}}
+        self._shards = {}
+        self._lock = threading.RLock()
+        self._listeners = []
+
+    @property
+    def version(self):
+        """Counter that changes whenever any opened shard changes"""
+        return sum(shard.version for shard in list(self._shards.values()))
+
+    def subscribe(self, callback):
+        """Register a callback for booking mutations"""
+        self._listeners.append(callback)
+
+    def _notify(self, event, old, new):
+        for callback in self._listeners:
+            try:
+                callback(event, old, new)
+            except Exception as e:
+                logging.error(f"Booking store listener failed on {event}: {e}")
+
+    def _read_registry(self):
+        """Reload shards.json if it changed, returning False if it does not exist"""
+        signature = file_signature(self._registry_path)
+        if signature is None:
+            return False
+        if signature != self._registry_signature:
+            try:
+                with open(self._registry_path, 'r') as f:
+                    self._registry = json.load(f)
+                self._registry_signature = signature
+            except (OSError, ValueError) as e:
+                logging.error(f"Error loading booking shard registry: {e}")
+        return True
+
+    def _load_registry(self):
+        """Load shards.json, migrating the legacy bookings file on first use"""
+        if self._read_registry():
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(self._registry_lock_path):
+            # Another worker may have migrated while we waited for the lock
+            if not self._read_registry():
+                self._migrate()
+
+    def _save_registry(self, registry):
+        """Write the registry, raising OSError on failure"""
+        _write_json(self._registry_path, registry)
+        self._registry = registry
+        self._registry_signature = file_signature(self._registry_path)
+
+    def _migrate(self):
+        """Split the legacy single-file bookings into shards.
+
+        Runs only while holding the registry lock file and only into a
+        directory without shard files; shard files are never overwritten.
+        A marker file records that the legacy file was imported so it is
+        not imported again. Raises RuntimeError instead of guessing when
+        shard files exist without a registry.
+        """
+        shard_files = sorted(name for name in os.listdir(self.directory)
+                             if name.endswith('.json') and name != os.path.basename(self._registry_path))
+        if shard_files:
+            raise RuntimeError(f"Booking shard registry {self._registry_path} is missing "
+                               f"but shard files exist: {', '.join(shard_files)}")
+
+        bookings = []
+        if os.path.exists(self._migrated_marker_path):
+            logging.warning("Legacy bookings were already migrated, starting with an empty shard registry")
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, 'r') as f:
+                    bookings = json.load(f)
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"Error loading legacy bookings: {e}") from e
+
+        registry = {'shards': {}, 'rooms': {}}
+        shards = {}
+        for booking in sorted(bookings, key=lambda b: b['id']):
+            key = self._assign_shard_key(registry, booking['room_id'])
+            shard_bookings = shards.setdefault(key, [])
+            booking_id = (len(shard_bookings) + 1) * SHARD_ID_STRIDE + registry['shards'][key]
+            shard_bookings.append(dict(booking, id=booking_id, legacy_id=booking['id']))
+
+        for key, shard_bookings in shards.items():
+            _write_json(os.path.join(self.directory, f"{key}.json"),
+                        {'next_seq': len(shard_bookings) + 1, 'bookings': shard_bookings})
+        self._save_registry(registry)
+        with open(self._migrated_marker_path, 'w') as f:
+            f.write(f"{self.legacy_path}\n")
+        logging.info(f"Migrated {len(bookings)} bookings into {len(shards)} shards")
+
+    def _assign_shard_key(self, registry, room_id):
+        """Assign a room to the shard of its location in ``registry``"""
+        room = self.catalog.get(room_id)
+        key = shard_key(room.get('location') if room else None)
+        if key not in registry['shards']:
+            number = max(registry['shards'].values(), default=0) + 1
+            if number >= SHARD_ID_STRIDE:
+                raise RuntimeError(f"Cannot add shard {key}: booking ids support at most "
+                                   f"{SHARD_ID_STRIDE - 1} shards")
+            registry['shards'][key] = number
+        registry['rooms'][str(room_id)] = key
+        return key
+
+    def _room_shard_key(self, room_id, create=False):
+        """Get the shard key of a room, assigning one from its location if create is set"""
+        key = self._registry['rooms'].get(str(room_id))
+        if key or not create:
+            return key
+
+        with file_lock(self._registry_lock_path):
+            # Another worker may have assigned the room or taken the next shard number
+            self._read_registry()
+            key = self._registry['rooms'].get(str(room_id))
+            if key:
+                return key
+            registry = {'shards': dict(self._registry['shards']), 'rooms': dict(self._registry['rooms'])}
+            key = self._assign_shard_key(registry, room_id)
+            self._save_registry(registry)
+        return key
+
+    def _shard(self, key):
+        """Get the shard for a key, opening it on first use"""
+        shard = self._shards.get(key)
+        if shard is None:
+            path = os.path.join(self.directory, f"{key}.json")
+            shard = BookingShard(path, self._registry['shards'][key], self._notify)
+            self._shards[key] = shard
+        return shard
+
+    def _shard_for_room(self, room_id, create=False):
+        with self._lock:
+            self._load_registry()
+            key = self._room_shard_key(room_id, create=create)
+            return self._shard(key) if key else None
+
+    def _shard_for_id(self, booking_id):
+        with self._lock:
+            self._load_registry()
+            number = booking_id % SHARD_ID_STRIDE
+            for key, shard_number in self._registry['shards'].items():
+                if shard_number == number:
+                    return self._shard(key)
+        return None
+
+    def _shards_for_rooms(self, room_ids=None):
+        """Get the shards holding the given rooms, or all shards"""
+        with self._lock:
+            self._load_registry()
+            if room_ids is None:
+                keys = set(self._registry['shards'])
+            else:
+                keys = {self._room_shard_key(room_id) for room_id in room_ids} - {None}
+            return [self._shard(key) for key in sorted(keys)]
+
+    def sync_state(self):
+        """Get the revision of every shard by shard number"""
+        return {shard.number: shard.revision() for shard in self._shards_for_rooms()}
+
+    def changes_since(self, state):
+        """Get (bookings, tombstones) written after a sync_state().
+
+        Shards missing from ``state`` are listed in full. Returns None if
+        any shard cannot list its changes since the given revision.
+        """
+        bookings = []
+        tombstones = []
+        for shard in self._shards_for_rooms():
+            if shard.number not in state:
+                # The shard was created after the state was taken
+                bookings.extend(shard.all())
+                continue
+            changes = shard.changes_since(state[shard.number])
+            if changes is None:
+                return None
+            bookings.extend(changes[0])
+            tombstones.extend(changes[1])
+        return bookings, tombstones
+
+    def refresh(self):
+        """Reload the registry and any opened shard that changed on disk"""
+        with self._lock:
+            self._load_registry()
+            shards = list(self._shards.values())
+        for shard in shards:
+            shard.refresh()
+
+    def all(self):
+        """Get copies of all bookings across every shard"""
+        return [b for shard in self._shards_for_rooms() for b in shard.all()]
+
+    def get(self, booking_id):
+        """Get a copy of a booking by id, or None"""
+        shard = self._shard_for_id(booking_id)
+        return shard.get(booking_id) if shard else None
+
+    def for_room_date(self, room_id, date, status='confirmed'):
+        """Get copies of a room's bookings on a date, sorted by start time"""
+        shard = self._shard_for_room(room_id)
+        return shard.for_room_date(room_id, date, status) if shard else []
+
+    def between(self, start_date, end_date, status='confirmed', room_ids=None):
+        """Get copies of bookings dated from start_date to end_date inclusive"""
+        bookings = []
+        for shard in self._shards_for_rooms(room_ids):
+            bookings.extend(shard.between(start_date, end_date, status))
+        if room_ids is not None:
+            bookings = [b for b in bookings if b['room_id'] in room_ids]
+        return bookings
+
+    def add(self, booking, validate=None):
+        """Add a booking to its room's shard, see BookingShard.add()"""
+        try:
+            shard = self._shard_for_room(booking['room_id'], create=True)
+        except (OSError, RuntimeError) as e:
+            logging.error(f"Error assigning a booking shard: {e}")
+            return None, 'save_error'
+        return shard.add(booking, validate)
+
+    def update(self, booking_id, changes, validate=None, expected_version=None):
+        """Update a booking in its shard, see BookingShard.update()"""
+        shard = self._shard_for_id(booking_id)
+        if shard is None:
+            return None, 'booking_not_found'
+        return shard.update(booking_id, changes, validate, expected_version)
+
+    def delete(self, booking_id):
+        """Remove a booking from its shard"""
+        shard = self._shard_for_id(booking_id)
+        return shard.delete(booking_id) if shard else None
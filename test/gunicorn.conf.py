@@ -0,0 +1,7 @@
+wsgi_app = 'main:app'
+
+
+def post_worker_init(worker):
+    """Start the room status scheduler in each worker once the app is loaded"""
+    from app import status_scheduler
+    status_scheduler.start()
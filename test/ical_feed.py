@@ -0,0 +1,214 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from status_scheduler import KZ_TIMEZONE
+
+PRODID = '-//Sapa Group//Meeting Room Booking//EN'
+
+# Feeds include bookings from this many days ago onwards
+FEED_PAST_DAYS = 30
+FEED_END_DATE = '9999-12-31'
+
+# Rendered feeds kept in memory, least recently used dropped first
+MAX_CACHED_FEEDS = 256
+
+# iCalendar content lines are folded at 75 octets
+MAX_LINE_OCTETS = 75
+
+
+def escape_text(value):
+    """Escape a TEXT property value"""
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold_line(line):
+    """Fold a content line into chunks of at most 75 octets"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line
+
+    parts = []
+    limit = MAX_LINE_OCTETS
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        # Continuation lines start with a space that counts towards the limit
+        limit = MAX_LINE_OCTETS - 1
+    return '\r\n '.join(parts)
+
+
+def to_utc(date, time):
+    """Convert a local 'YYYY-MM-DD', 'HH:MM' pair to an iCalendar UTC timestamp"""
+    local = datetime.strptime(f"{date} {time}", '%Y-%m-%d %H:%M').replace(tzinfo=KZ_TIMEZONE)
+    return local.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def modified_stamp(booking, default):
+    """Get a stable DTSTAMP from when a booking was last written, so ETags survive re-rendering"""
+    value = booking.get('updated_at') or booking.get('created_at')
+    try:
+        local = datetime.fromisoformat(value).replace(tzinfo=KZ_TIMEZONE)
+    except (TypeError, ValueError):
+        return default
+    return local.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def booking_uid(booking_id):
+    return f"booking-{booking_id}@sapa-room-booking"
+
+
+def format_sync_token(state):
+    """Format a booking store sync_state() as a token, e.g. '1-57.2-13'"""
+    return '.'.join(f"{number}-{revision}" for number, revision in sorted(state.items())) or '0'
+
+
+def parse_sync_token(token):
+    """Parse a sync token back into a sync state, or None if it is malformed"""
+    if token == '0':
+        return {}
+    state = {}
+    for part in (token or '').split('.'):
+        number, _, revision = part.partition('-')
+        if not (number.isdigit() and revision.isdigit()):
+            return None
+        state[int(number)] = int(revision)
+    return state
+
+
+class CalendarFeeds:
+    """iCalendar feeds of bookings per user and per room.
+
+    Feeds are keyed by ('user', name, company) or ('room', room_id) and
+    rendered once per (feed, sync token, store state); calendar clients
+    polling an unchanged store are served from the cache.
+
+    Sync tokens encode the revision of every booking store shard (see
+    BookingStore.sync_state()), which is stored in the shard files, so a
+    token means the same in every worker and after restarts. A request
+    with a token only returns events changed after it, with deleted and
+    cancelled bookings sent as cancelled events. Malformed tokens and
+    tokens older than the store's tombstones get the full feed.
+    """
+
+    def __init__(self, store, catalog):
+        self.store = store
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def _matches(key, item):
+        """Check if a booking or tombstone belongs to a feed"""
+        if key[0] == 'room':
+            return item['room_id'] == key[1]
+        return item.get('user_name') == key[1] and item.get('user_company') == key[2]
+
+    def _bookings(self, key, start_date):
+        if key[0] == 'room':
+            bookings = self.store.between(start_date, FEED_END_DATE, room_ids=[key[1]])
+        else:
+            bookings = [b for b in self.store.between(start_date, FEED_END_DATE) if self._matches(key, b)]
+        return {b['id']: b for b in bookings}
+
+    def _changed_since(self, key, since, start_date):
+        """Get the latest state of each booking in a feed changed after a sync state, or None"""
+        changes = self.store.changes_since(since)
+        if changes is None:
+            return None
+        bookings, tombstones = changes
+        changed = {t['id']: None for t in tombstones if self._matches(key, t)}
+        for booking in bookings:
+            if self._matches(key, booking) and booking['date'] >= start_date:
+                changed[booking['id']] = booking
+        return changed
+
+    def feed(self, key, name, since=None):
+        """Render a feed, returning (body, etag, sync_token).
+
+        With a usable ``since`` token only the bookings changed after it
+        are included.
+        """
+        start_date = (datetime.now() - timedelta(days=FEED_PAST_DAYS)).strftime('%Y-%m-%d')
+        token = format_sync_token(self.store.sync_state())
+        since_state = parse_sync_token(since) if since else None
+        cache_key = (key, since if since_state is not None else None, start_date, token)
+
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+        bookings = None
+        if since_state is not None:
+            bookings = self._changed_since(key, since_state, start_date)
+        if bookings is None:
+            bookings = self._bookings(key, start_date)
+
+        body = self.render(name, bookings)
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        result = (body, etag, token)
+
+        with self._lock:
+            self._cache[cache_key] = result
+            while len(self._cache) > MAX_CACHED_FEEDS:
+                self._cache.popitem(last=False)
+        logging.debug(f"Rendered calendar feed {key} with {len(bookings)} events")
+        return result
+
+    def render(self, name, bookings):
+        """Render bookings as a VCALENDAR; None values and cancelled bookings become cancelled events"""
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        lines = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            f"PRODID:{PRODID}",
+            'CALSCALE:GREGORIAN',
+            'METHOD:PUBLISH',
+            f"X-WR-CALNAME:{escape_text(name)}",
+        ]
+        for booking_id in sorted(bookings):
+            booking = bookings[booking_id]
+            if booking is None or booking.get('status') != 'confirmed':
+                lines += [
+                    'BEGIN:VEVENT',
+                    f"UID:{booking_uid(booking_id)}",
+                    f"DTSTAMP:{stamp}",
+                    'STATUS:CANCELLED',
+                    'END:VEVENT',
+                ]
+                continue
+
+            try:
+                start = to_utc(booking['date'], booking['start_time'])
+                end = to_utc(booking['date'], booking['end_time'])
+            except (KeyError, ValueError) as e:
+                logging.error(f"Skipping booking {booking_id} in calendar feed: {e}")
+                continue
+
+            room = self.catalog.get(booking['room_id'])
+            room_name = room['name'] if room else f"Room {booking['room_id']}"
+            summary = booking.get('purpose') or room_name
+            lines += [
+                'BEGIN:VEVENT',
+                f"UID:{booking_uid(booking_id)}",
+                f"DTSTAMP:{modified_stamp(booking, stamp)}",
+                f"SEQUENCE:{booking.get('version', 1) - 1}",
+                f"DTSTART:{start}",
+                f"DTEND:{end}",
+                f"SUMMARY:{escape_text(summary)}",
+                f"LOCATION:{escape_text(room_name)}",
+                f"DESCRIPTION:{escape_text(booking.get('user_name', ''))} ({escape_text(booking.get('user_company', ''))})",
+                'STATUS:CONFIRMED',
+                'END:VEVENT',
+            ]
+        lines.append('END:VCALENDAR')
+        return '\r\n'.join(fold_line(line) for line in lines) + '\r\n'
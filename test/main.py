@@ -1,4 +1,10 @@
-from app import app
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+import os
+
+from app import app, status_scheduler
+
+if __name__ == '__main__':
+    debug = True
+    # With the debug reloader only its child process serves requests
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        status_scheduler.start()
+    app.run(host='0.0.0.0', port=5000, debug=debug)
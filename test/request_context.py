@@ -0,0 +1,97 @@
+from functools import cached_property
+
+from flask import session
+
+from translations import TRANSLATIONS, get_companies
+
+
+class RequestContext:
+    """Per-request view of the session user, language and cached data.
+
+    One instance is created per request and shared by routes and
+    templates. Every attribute is resolved lazily on first use and then
+    cached for the rest of the request, so the session, translation
+    catalog, room catalog and booking store are each consulted at most
+    once.
+    """
+
+    def __init__(self, catalog, store):
+        self._catalog = catalog
+        self._store = store
+
+    @cached_property
+    def lang(self):
+        return session.get('lang', 'ru')
+
+    @cached_property
+    def messages(self):
+        """Translation catalog for the current language"""
+        return TRANSLATIONS.get(self.lang, TRANSLATIONS['en'])
+
+    def translate(self, key, default=None):
+        """Get translation for a key in the current language"""
+        return self.messages.get(key, default or key)
+
+    @cached_property
+    def user_name(self):
+        return session.get('user_name')
+
+    @cached_property
+    def user_company(self):
+        return session.get('user_company')
+
+    @property
+    def is_registered(self):
+        return self.user_name is not None and self.user_company is not None
+
+    def set_user(self, name, company):
+        """Store the user in the session and refresh the cached values"""
+        session['user_name'] = name
+        session['user_company'] = company
+        self.__dict__.pop('user_name', None)
+        self.__dict__.pop('user_company', None)
+        self.__dict__.pop('user_bookings', None)
+
+    @cached_property
+    def companies(self):
+        return get_companies()
+
+    @cached_property
+    def rooms(self):
+        """Rooms by id, copied once for this request"""
+        return {room['id']: room for room in self._catalog.all()}
+
+    def room(self, room_id):
+        """Get a room by id, or None"""
+        return self.rooms.get(room_id)
+
+    @cached_property
+    def bookings(self):
+        """Snapshot of all bookings taken once for this request"""
+        return self._store.all()
+
+    @cached_property
+    def user_bookings(self):
+        """Confirmed bookings owned by the current user"""
+        return [b for b in self.bookings
+                if b['status'] == 'confirmed' and
+                b['user_name'] == self.user_name and b['user_company'] == self.user_company]
+
+    def user_booking(self, booking_id):
+        """Get a confirmed booking owned by the current user, or None"""
+        booking = self._store.get(booking_id)
+        if (booking and booking['status'] == 'confirmed' and
+                booking['user_name'] == self.user_name and booking['user_company'] == self.user_company):
+            return booking
+        return None
+
+    def template_globals(self):
+        """Variables injected into every template"""
+        return {
+            'get_translation': self.translate,
+            'lang': self.lang,
+            'companies': self.companies,
+            'user_name': self.user_name,
+            'user_company': self.user_company,
+            'is_registered': self.is_registered
+        }
@@ -0,0 +1,157 @@
+import os
+import re
+import sys
+import hmac
+import time
+import random
+import logging
+import fcntl
+import tempfile
+from collections import Counter
+
+# Requests carrying this header with the configured token are always profiled
+PROFILE_HEADER = 'X-Profile'
+
+
+def frame_label(frame):
+    """Get the collapsed-stack label of a Python frame, e.g. 'app.py:index'"""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(';', ':')
+
+
+def builtin_label(func):
+    """Get the collapsed-stack label of a C function, e.g. 'json:loads'"""
+    module = getattr(func, '__module__', None) or type(getattr(func, '__self__', None)).__name__
+    return f"{module}:{getattr(func, '__qualname__', func)}".replace(';', ':')
+
+
+class ProfileSession:
+    """Call stacks and self time recorded for one request.
+
+    Installed with sys.setprofile() on the request's thread. Each
+    function's self time is attributed to its full call path, relative to
+    the point where profiling started, in microseconds.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.times = Counter()
+        self._paths = []
+        self._last = self.started
+
+    def _charge(self, now):
+        if self._paths:
+            self.times[self._paths[-1]] += now - self._last
+        self._last = now
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter()
+        self._charge(now)
+        if event == 'call':
+            label = frame_label(frame)
+        elif event == 'c_call':
+            label = builtin_label(arg)
+        elif self._paths:
+            # 'return', 'c_return' and 'c_exception'
+            self._paths.pop()
+            return
+        else:
+            # Returning from frames entered before profiling started
+            return
+        self._paths.append(f"{self._paths[-1]};{label}" if self._paths else label)
+
+    def collapsed(self):
+        """Get the recorded stacks with their self time in whole microseconds"""
+        return Counter({path: round(seconds * 1e6) for path, seconds in self.times.items()
+                        if round(seconds * 1e6)})
+
+
+class RequestProfiler:
+    """Opt-in profiler for Flask requests.
+
+    A request is profiled if it sends PROFILE_HEADER with the configured
+    token, or at random with probability ``sample_rate``. Profiled requests
+    record every Python and C call on their thread, so their own timing is
+    inflated; other requests only pay for the enable check. When a request
+    ends its stacks are merged into ``<directory>/<endpoint>.folded`` in
+    collapsed-stack format ('frame;frame;frame microseconds' per line),
+    which flamegraph.pl, speedscope and similar tools read directly.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, token=None):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0
+
+    def wants(self, header_value):
+        """Check if a request should be profiled"""
+        if self.token and header_value and hmac.compare_digest(header_value.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """Start profiling the current thread, returning its session"""
+        session = ProfileSession()
+        sys.setprofile(session)
+        return session
+
+    def stop(self, session, endpoint):
+        """Stop profiling and merge the session into the endpoint's file"""
+        sys.setprofile(None)
+        elapsed = time.perf_counter() - session.started
+        stacks = session.collapsed()
+        logging.info(f"Profiled {endpoint} in {elapsed * 1000:.1f}ms ({len(stacks)} stacks)")
+        if stacks:
+            self._merge(endpoint, stacks)
+
+    def path(self, endpoint):
+        name = re.sub(r'[^\w.-]+', '_', endpoint or 'unmatched')
+        return os.path.join(self.directory, f"{name}.folded")
+
+    def _merge(self, endpoint, stacks):
+        """Add stacks to the aggregated collapsed-stack file of an endpoint.
+
+        The read-merge-write runs under an flock on ``<file>.lock`` so
+        threads and worker processes profiling the same endpoint never
+        drop each other's stacks.
+        """
+        path = self.path(endpoint)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            lock = open(f"{path}.lock", 'a')
+        except OSError as e:
+            logging.error(f"Error writing profile {path}: {e}")
+            return
+
+        # Closing the lock file releases the lock
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            totals = Counter()
+            try:
+                with open(path, 'r') as f:
+                    for line in f:
+                        stack, _, count = line.rstrip('\n').rpartition(' ')
+                        if stack and count.isdigit():
+                            totals[stack] += int(count)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.error(f"Error reading profile {path}: {e}")
+                return
+
+            totals.update(stacks)
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    for stack, count in sorted(totals.items()):
+                        f.write(f"{stack} {count}\n")
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logging.error(f"Error writing profile {path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
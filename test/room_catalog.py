@@ -0,0 +1,120 @@
+import json
+import logging
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+from booking_store import file_signature
+
+
+def _normalize(value):
+    """Normalize a feature or location name for index lookups"""
+    return ' '.join(str(value).split()).casefold()
+
+
+# One immutable build of the catalog; readers take a reference and never see a partial reload
+RoomIndex = namedtuple('RoomIndex', ['signature', 'rooms', 'by_id', 'by_feature', 'by_location',
+                                     'capacities', 'capacity_ids'])
+
+EMPTY_INDEX = RoomIndex(None, (), {}, {}, {}, [], [])
+
+
+def build_index(rooms, signature):
+    """Build the id map, inverted indexes and sorted capacity list of a room list"""
+    by_id = {}
+    by_feature = {}
+    by_location = {}
+    for room in rooms:
+        by_id[room['id']] = room
+        for feature in room.get('features', []):
+            by_feature.setdefault(_normalize(feature), set()).add(room['id'])
+        if room.get('location'):
+            by_location.setdefault(_normalize(room['location']), set()).add(room['id'])
+
+    by_capacity = sorted(rooms, key=lambda r: r.get('capacity', 0))
+    return RoomIndex(signature, tuple(rooms), by_id, by_feature, by_location,
+                     [r.get('capacity', 0) for r in by_capacity],
+                     [r['id'] for r in by_capacity])
+
+
+class RoomCatalog:
+    """In-memory room catalog with id, feature, location and capacity indexes.
+
+    The catalog is loaded once from rooms.json and reloaded automatically
+    when the file's signature (see file_signature()) changes. Every load
+    builds a new RoomIndex and publishes it with a single assignment, so
+    readers work on one consistent index without taking the lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = EMPTY_INDEX
+        self._missing = False
+
+    def _load(self):
+        """Read rooms.json and rebuild the index if the file changed"""
+        signature = file_signature(self.path)
+        if signature is None:
+            if not self._missing:
+                logging.error("Rooms data file not found")
+                self._missing = True
+                self._index = EMPTY_INDEX
+            return
+        self._missing = False
+
+        if signature == self._index.signature:
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                rooms = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading rooms: {e}")
+            return
+
+        self._index = build_index(rooms, signature)
+        logging.debug(f"Room catalog loaded {len(rooms)} rooms from {self.path}")
+
+    def refresh(self):
+        """Reload the catalog if rooms.json changed on disk, returning the current index"""
+        with self._lock:
+            self._load()
+            return self._index
+
+    def all(self):
+        """Get a copy of all rooms in file order"""
+        return [dict(room) for room in self.refresh().rooms]
+
+    def get(self, room_id):
+        """Get a copy of a room by id, or None"""
+        room = self.refresh().by_id.get(room_id)
+        return dict(room) if room else None
+
+    def ids(self):
+        """Get all room ids in file order"""
+        return [room['id'] for room in self.refresh().rooms]
+
+    def search(self, min_capacity=None, features=(), location=None):
+        """Find rooms matching all of the given filters.
+
+        Capacity is resolved with a binary search over the sorted capacity
+        list, features and location through the inverted indexes.
+        """
+        index = self.refresh()
+
+        if min_capacity is not None:
+            start = bisect_left(index.capacities, min_capacity)
+            candidates = set(index.capacity_ids[start:])
+        else:
+            candidates = set(index.by_id)
+
+        for feature in features:
+            candidates &= index.by_feature.get(_normalize(feature), set())
+            if not candidates:
+                return []
+
+        if location:
+            candidates &= index.by_location.get(_normalize(location), set())
+
+        return [dict(room) for room in index.rooms if room['id'] in candidates]
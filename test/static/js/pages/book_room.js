@@ -0,0 +1,256 @@
+// Initialize room booking functionality
+document.addEventListener('DOMContentLoaded', function() {
+    const config = JSON.parse(document.getElementById('page-config').textContent);
+    const roomId = config.roomId;
+    const dateInput = document.getElementById('date');
+    const startTimeInput = document.getElementById('start_time');
+    const endTimeInput = document.getElementById('end_time');
+    const availabilityDisplay = document.getElementById('availabilityDisplay');
+
+    let userSetEndTime = false; // Track if user manually set end time
+
+    // Load availability when date changes
+    dateInput.addEventListener('change', function() {
+        loadRoomAvailability();
+        userSetEndTime = false; // Reset tracking when date changes
+    });
+
+    // Load initial availability for today
+    loadRoomAvailability();
+
+    // Auto-refresh availability every 30 seconds for booking page
+    setInterval(() => {
+        if (dateInput.value) {
+            loadRoomAvailability();
+        }
+    }, 30000);
+
+    function loadRoomAvailability() {
+        const selectedDate = dateInput.value;
+        if (!selectedDate) return;
+
+        fetch(`/api/room-availability/${roomId}?date=${selectedDate}`)
+            .then(response => response.json())
+            .then(data => {
+                displayAvailability(data.occupied_slots);
+            })
+            .catch(error => {
+                console.error('Error loading availability:', error);
+                availabilityDisplay.innerHTML = `<div class="text-danger">${config.strings.error_loading_availability}</div>`;
+            });
+    }
+
+    function displayAvailability(occupiedSlots) {
+        if (occupiedSlots.length === 0) {
+            availabilityDisplay.innerHTML = `
+                <div class="text-success">
+                    <i class="fas fa-check-circle me-2"></i>
+                    ${config.strings.no_bookings_available_all_day}
+                </div>
+            `;
+            return;
+        }
+
+        let html = '<div class="row g-2">';
+        occupiedSlots.forEach(slot => {
+            html += `
+                <div class="col-12">
+                    <div class="card border-danger">
+                        <div class="card-body py-2">
+                            <div class="d-flex flex-column flex-sm-row justify-content-between align-items-start align-items-sm-center">
+                                <div class="flex-grow-1">
+                                    <strong class="text-danger">${slot.start} - ${slot.end}</strong>
+                                    <small class="text-muted d-block">${config.strings.booked_by}: ${slot.user}</small>
+                                    ${slot.purpose ? `<small class="text-muted">${slot.purpose}</small>` : ''}
+                                </div>
+                                <span class="badge bg-danger mt-2 mt-sm-0">${config.strings.occupied}</span>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            `;
+        });
+        html += '</div>';
+
+        availabilityDisplay.innerHTML = html;
+    }
+
+    // Auto-set end time when start time changes (add 1 hour, but user can override)
+    startTimeInput.addEventListener('change', function() {
+        if (!userSetEndTime) {
+            updateEndTime();
+        }
+        validateTime();
+    });
+
+    // Track when user manually sets end time
+    endTimeInput.addEventListener('input', function() {
+        userSetEndTime = true;
+        validateTime();
+    });
+
+    // Reset user override when start time changes significantly
+    startTimeInput.addEventListener('input', function() {
+        if (userSetEndTime) {
+            const currentStart = startTimeInput.value;
+            const currentEnd = endTimeInput.value;
+
+            if (currentStart && currentEnd) {
+                const startTime = new Date(`1970-01-01T${currentStart}`);
+                const endTime = new Date(`1970-01-01T${currentEnd}`);
+                const diffHours = (endTime - startTime) / (1000 * 60 * 60);
+
+                // If difference is more than 3 hours, auto-update end time
+                if (diffHours > 3) {
+                    userSetEndTime = false;
+                    updateEndTime();
+                }
+            }
+        }
+        validateTime();
+    });
+
+    // Validate date changes
+    dateInput.addEventListener('change', function() {
+        validateDateTime();
+    });
+
+    // Add form submission validation
+    document.getElementById('bookingForm').addEventListener('submit', function(e) {
+        // Force validation check before submission
+        validateDateTime();
+
+        const selectedDate = dateInput.value;
+        const startTime = startTimeInput.value;
+
+        if (selectedDate && startTime) {
+            const now = new Date();
+            const bookingDateTime = new Date(`${selectedDate}T${startTime}`);
+            const today = new Date().toISOString().split('T')[0];
+
+            // Check if booking is in the past
+            let isPastTime = false;
+
+            if (bookingDateTime <= now) {
+                isPastTime = true;
+            } else if (selectedDate === today) {
+                const currentHour = now.getHours();
+                const currentMinute = now.getMinutes();
+                const [bookingHour, bookingMinute] = startTime.split(':').map(Number);
+
+                if (bookingHour < currentHour || (bookingHour === currentHour && bookingMinute <= currentMinute)) {
+                    isPastTime = true;
+                }
+            }
+
+            if (isPastTime) {
+                e.preventDefault();
+                alert(config.strings.cannot_book_past_time);
+                startTimeInput.focus();
+                return false;
+            }
+        }
+
+        // Check if form is valid
+        if (!this.checkValidity()) {
+            e.preventDefault();
+            return false;
+        }
+    });
+
+    function updateEndTime() {
+        const startTime = startTimeInput.value;
+        if (!startTime) return;
+
+        try {
+            const [startHours, startMinutes] = startTime.split(':').map(Number);
+            let endHours = startHours + 1;
+            let endMinutes = startMinutes;
+
+            // If start time is 17:45 or later, set end time to 18:00
+            if (startHours >= 17 && startMinutes >= 45) {
+                endHours = 18;
+                endMinutes = 0;
+            }
+            // Ensure end time is within working hours (max 18:00)
+            else if (endHours > 18) {
+                endHours = 18;
+                endMinutes = 0;
+            }
+
+            const formattedEndTime = `${endHours.toString().padStart(2, '0')}:${endMinutes.toString().padStart(2, '0')}`;
+
+            // Set end time only if it's within working hours
+            if (endHours <= 18) {
+                endTimeInput.value = formattedEndTime;
+            }
+        } catch (error) {
+            console.error('Error updating end time:', error);
+        }
+    }
+
+    function validateTime() {
+        const startTime = startTimeInput.value;
+        const endTime = endTimeInput.value;
+
+        if (startTime && endTime) {
+            // Check if end time is after start time
+            if (startTime >= endTime) {
+                endTimeInput.setCustomValidity(config.strings.end_time_after_start);
+            } else {
+                endTimeInput.setCustomValidity('');
+            }
+
+            // Check working hours
+            const startHour = parseInt(startTime.split(':')[0]);
+            const endHour = parseInt(endTime.split(':')[0]);
+
+            if (startHour < 9) {
+                startTimeInput.setCustomValidity(config.strings.working_hours_only);
+            } else if (startHour >= 18) {
+                startTimeInput.setCustomValidity(config.strings.working_hours_only);
+            } else {
+                startTimeInput.setCustomValidity('');
+            }
+
+            if (endHour > 18 || (endHour == 18 && parseInt(endTime.split(':')[1]) > 1)) {
+                endTimeInput.setCustomValidity(config.strings.working_hours_only);
+            } else {
+                endTimeInput.setCustomValidity('');
+            }
+        }
+    }
+
+    function validateDateTime() {
+        const selectedDate = dateInput.value;
+        const startTime = startTimeInput.value;
+
+        if (selectedDate && startTime) {
+            const now = new Date();
+            const bookingDateTime = new Date(`${selectedDate}T${startTime}`);
+            const today = new Date().toISOString().split('T')[0];
+
+            // Check if booking is in the past
+            if (bookingDateTime <= now) {
+                startTimeInput.setCustomValidity(config.strings.cannot_book_past_time);
+                dateInput.setCustomValidity(config.strings.cannot_book_past_time);
+            } 
+            // Additional check for today's date with current time
+            else if (selectedDate === today) {
+                const currentHour = now.getHours();
+                const currentMinute = now.getMinutes();
+                const [bookingHour, bookingMinute] = startTime.split(':').map(Number);
+
+                if (bookingHour < currentHour || (bookingHour === currentHour && bookingMinute <= currentMinute)) {
+                    startTimeInput.setCustomValidity(config.strings.cannot_book_past_time);
+                } else {
+                    startTimeInput.setCustomValidity('');
+                    dateInput.setCustomValidity('');
+                }
+            } else {
+                startTimeInput.setCustomValidity('');
+                dateInput.setCustomValidity('');
+            }
+        }
+    }
+});
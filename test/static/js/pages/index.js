@@ -0,0 +1,91 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const config = JSON.parse(document.getElementById('page-config').textContent);
+    console.log('Initializing room status updates...');
+
+    // Auto-update room statuses every 5 seconds
+    const updateInterval = setInterval(() => {
+        updateRoomStatuses();
+    }, 5000);
+
+    function updateRoomStatuses() {
+        const currentTime = new Date().toLocaleTimeString('ru-RU', { 
+            hour: '2-digit', 
+            minute: '2-digit',
+            second: '2-digit'
+        });
+        console.log(`Updating room statuses at ${currentTime}...`);
+
+        fetch('/api/room-status')
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                console.log('Room status data received:', data);
+
+                Object.keys(data).forEach(roomId => {
+                    updateRoomCard(roomId, data[roomId]);
+                });
+            })
+            .catch(error => {
+                console.error('Error updating room statuses:', error);
+            });
+    }
+
+    function updateRoomCard(roomId, status) {
+        const roomCard = document.querySelector(`[data-room-id="${roomId}"]`);
+        if (!roomCard) {
+            console.warn(`Room card not found for room ID: ${roomId}`);
+            return;
+        }
+
+        const statusBadge = roomCard.querySelector('.status-badge');
+        const statusIcon = roomCard.querySelector('.status-icon');
+        const statusText = roomCard.querySelector('.status-text');
+
+        if (!statusBadge || !statusIcon || !statusText) {
+            console.warn(`Status elements not found for room ${roomId}`);
+            return;
+        }
+
+        const isAvailable = status === 'available';
+        const oldStatus = statusBadge.classList.contains('bg-success') ? 'available' : 'occupied';
+
+        // Only update if status actually changed
+        if ((isAvailable && oldStatus !== 'available') || (!isAvailable && oldStatus !== 'occupied')) {
+            console.log(`Room ${roomId} status changed from ${oldStatus} to ${status}`);
+
+            // Update badge class and color
+            statusBadge.className = `badge status-badge ${isAvailable ? 'bg-success' : 'bg-danger'}`;
+
+            // Update icon
+            statusIcon.className = `fas ${isAvailable ? 'fa-check' : 'fa-times'} me-1 status-icon`;
+
+            // Update text
+            if (isAvailable) {
+                statusText.textContent = config.strings.available;
+            } else {
+                statusText.textContent = config.strings.occupied;
+            }
+
+            // Add visual feedback for status change
+            roomCard.style.transition = 'all 0.3s ease';
+            roomCard.style.transform = 'scale(1.02)';
+            setTimeout(() => {
+                roomCard.style.transform = 'scale(1)';
+            }, 300);
+        }
+    }
+
+    // Initial update after a short delay
+    setTimeout(() => {
+        updateRoomStatuses();
+    }, 1000);
+
+    // Clean up interval when page unloads
+    window.addEventListener('beforeunload', () => {
+        clearInterval(updateInterval);
+    });
+});
@@ -0,0 +1,229 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const config = JSON.parse(document.getElementById('page-config').textContent);
+    const roomId = config.roomId;
+    const currentWeekDiv = document.getElementById('currentWeek');
+    const nextWeekDiv = document.getElementById('nextWeek');
+    const bookingsListDiv = document.getElementById('bookingsList');
+    let selectedDate = config.selectedDate; // Use the date from URL or today
+    let refreshInterval = null;
+    
+    // Company mapping for display
+    const companies = Object.fromEntries(config.companies.map(company => [company.id, company.name]));
+    
+    // Initialize week view
+    initializeWeekView();
+    
+    // Auto-load today's schedule if no date selected
+    if (selectedDate) {
+        loadScheduleForDate(selectedDate);
+        startAutoRefresh();
+    }
+    
+    // Cleanup on page unload
+    window.addEventListener('beforeunload', function() {
+        stopAutoRefresh();
+    });
+    
+    function initializeWeekView() {
+        const today = new Date();
+        const currentWeekDates = getWeekDates(today);
+        const nextWeekStart = new Date(today);
+        nextWeekStart.setDate(today.getDate() + 7);
+        const nextWeekDates = getWeekDates(nextWeekStart);
+        
+        renderWeek(currentWeekDiv, currentWeekDates, 'current');
+        renderWeek(nextWeekDiv, nextWeekDates, 'next');
+    }
+    
+    function getWeekDates(startDate) {
+        const dates = [];
+        const date = new Date(startDate);
+        // Get Monday of the week
+        const day = date.getDay();
+        const diff = date.getDate() - day + (day === 0 ? -6 : 1);
+        date.setDate(diff);
+        
+        for (let i = 0; i < 7; i++) {
+            dates.push(new Date(date));
+            date.setDate(date.getDate() + 1);
+        }
+        return dates;
+    }
+    
+    function renderWeek(container, dates, weekType) {
+        container.innerHTML = '';
+        const dayNames = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'];
+        
+        dates.forEach((date, index) => {
+            const dayDiv = document.createElement('div');
+            dayDiv.className = 'col';
+            
+            const isToday = date.toDateString() === new Date().toDateString();
+            const isPast = date < new Date().setHours(0,0,0,0);
+            const dateString = date.toISOString().split('T')[0];
+            const isSelected = dateString === selectedDate;
+            
+            dayDiv.innerHTML = `
+                <div class="card h-100 day-card ${isPast ? 'past-day' : ''} ${isToday ? 'today' : ''} ${isSelected ? 'border-primary bg-primary bg-opacity-10' : ''}" 
+                     data-date="${dateString}"
+                     style="cursor: pointer; transition: all 0.2s;">
+                    <div class="card-body text-center p-2">
+                        <small class="text-muted d-block">${dayNames[index]}</small>
+                        <strong class="d-block">${date.getDate()}</strong>
+                        <small class="text-muted">${date.toLocaleDateString('en-US', { month: 'short' })}</small>
+                    </div>
+                </div>
+            `;
+            
+            // Add click handler
+            dayDiv.addEventListener('click', function() {
+                selectDate(dateString);
+                highlightSelectedDay(this);
+            });
+            
+            container.appendChild(dayDiv);
+        });
+    }
+    
+    function highlightSelectedDay(selectedElement) {
+        // Remove previous selection
+        document.querySelectorAll('.day-card').forEach(card => {
+            card.classList.remove('border-primary', 'bg-primary', 'bg-opacity-10');
+        });
+        
+        // Highlight selected day
+        const card = selectedElement.querySelector('.day-card');
+        card.classList.add('border-primary', 'bg-primary', 'bg-opacity-10');
+    }
+    
+    function selectDate(date) {
+        selectedDate = date;
+        loadScheduleForDate(date);
+        startAutoRefresh();
+    }
+    
+    function startAutoRefresh() {
+        // Clear existing interval
+        if (refreshInterval) {
+            clearInterval(refreshInterval);
+        }
+        
+        // Refresh every 10 seconds when a date is selected for real-time updates
+        refreshInterval = setInterval(() => {
+            if (selectedDate) {
+                loadScheduleForDate(selectedDate, true);
+            }
+        }, 10000);
+    }
+    
+    function stopAutoRefresh() {
+        if (refreshInterval) {
+            clearInterval(refreshInterval);
+            refreshInterval = null;
+        }
+    }
+    
+    function loadScheduleForDate(date, showIndicator = false) {
+        const refreshIndicator = document.getElementById('refreshIndicator');
+        
+        if (showIndicator && refreshIndicator) {
+            refreshIndicator.style.display = 'inline';
+        } else if (!showIndicator) {
+            bookingsListDiv.innerHTML = `
+                <div class="text-center text-muted py-4">
+                    <i class="fas fa-spinner fa-spin fa-2x mb-3"></i>
+                    <p>${config.strings.loading}</p>
+                </div>
+            `;
+        }
+        
+        fetch(`/api/schedule/${roomId}?date=${date}`)
+            .then(response => response.json())
+            .then(data => {
+                displayBookings(data.bookings, date);
+                if (refreshIndicator) {
+                    refreshIndicator.style.display = 'none';
+                }
+            })
+            .catch(error => {
+                console.error('Error loading schedule:', error);
+                bookingsListDiv.innerHTML = `
+                    <div class="text-center text-danger py-4">
+                        <i class="fas fa-exclamation-triangle fa-2x mb-3"></i>
+                        <p>${config.strings.error_loading}</p>
+                    </div>
+                `;
+                if (refreshIndicator) {
+                    refreshIndicator.style.display = 'none';
+                }
+            });
+    }
+    
+    function displayBookings(bookings, date) {
+        const dateObj = new Date(date);
+        const formattedDate = dateObj.toLocaleDateString('en-US', { 
+            weekday: 'long', 
+            year: 'numeric', 
+            month: 'long', 
+            day: 'numeric' 
+        });
+        
+        if (bookings.length === 0) {
+            bookingsListDiv.innerHTML = `
+                <div class="text-center text-muted py-4">
+                    <i class="fas fa-calendar-check fa-2x mb-3"></i>
+                    <h6 class="text-muted mb-2">${formattedDate}</h6>
+                    <p>${config.strings.no_bookings}</p>
+                </div>
+            `;
+            return;
+        }
+        
+        let html = `
+            <div class="mb-3">
+                <h6 class="text-primary mb-3">
+                    <i class="fas fa-calendar me-1"></i>
+                    ${formattedDate}
+                </h6>
+            </div>
+            <div class="list-group list-group-flush">
+        `;
+        
+        // Sort bookings by start time
+        bookings.sort((a, b) => a.start_time.localeCompare(b.start_time));
+        
+        bookings.forEach(booking => {
+            const companyName = companies[booking.user_company] || booking.user_company;
+            html += `
+                <div class="list-group-item border-0 px-0 py-3 booking-item">
+                    <div class="d-flex align-items-start">
+                        <div class="me-3">
+                            <span class="badge bg-primary rounded-pill px-3 py-2">
+                                ${booking.start_time}–${booking.end_time}
+                            </span>
+                        </div>
+                        <div class="flex-grow-1">
+                            <h6 class="mb-1">
+                                <i class="fas fa-user me-1 text-muted"></i>
+                                ${booking.user_name}
+                            </h6>
+                            <p class="mb-1 company-name">
+                                <i class="fas fa-building me-1 text-muted"></i>
+                                ${companyName}
+                            </p>
+                            ${booking.purpose ? `
+                                <p class="mb-0 text-muted">
+                                    <i class="fas fa-clipboard me-1"></i>
+                                    ${booking.purpose}
+                                </p>
+                            ` : ''}
+                        </div>
+                    </div>
+                </div>
+            `;
+        });
+        
+        html += '</div>';
+        bookingsListDiv.innerHTML = html;
+    }
+});
@@ -0,0 +1,161 @@
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from booking_store import time_to_minutes
+
+# Room status follows Kazakhstan time (UTC+5)
+KZ_TIMEZONE = timezone(timedelta(hours=5))
+
+# Upper bound on sleep, and so on how long bookings written by other
+# workers take to show up in the snapshot
+MAX_SLEEP_SECONDS = 10
+
+
+class StatusScheduler:
+    """Background scheduler keeping a snapshot of current room statuses.
+
+    Today's booking starts and ends are kept in a heap of upcoming
+    transitions. A daemon thread sleeps until the next transition (or
+    midnight), updates the status snapshot and emits
+    ``callback(room_id, old_status, new_status, event, booking)`` to
+    subscribers, where event is 'start', 'end' or 'rebuild' (a booking
+    for today was added, moved or removed). Booking store mutations for
+    today wake the thread to rebuild the heap, and it reloads the store
+    every MAX_SLEEP_SECONDS to pick up other workers' writes.
+
+    The thread is started by the server entry point (main.py, or the
+    gunicorn hook in gunicorn.conf.py) rather than on import, so importing
+    the app has no side effects. Readers only copy the snapshot.
+    """
+
+    def __init__(self, store, catalog):
+        self.store = store
+        self.catalog = catalog
+        self._process_lock = threading.RLock()
+        self._wake = threading.Event()
+        self._dirty = True
+        self._date = None
+        self._heap = []
+        self._statuses = {}
+        self._listeners = []
+        self._thread = None
+        store.subscribe(self._on_booking_event)
+
+    def _now(self):
+        return datetime.now(KZ_TIMEZONE).replace(tzinfo=None)
+
+    def subscribe(self, callback):
+        """Register a callback for room status transitions"""
+        self._listeners.append(callback)
+
+    def _on_booking_event(self, event, old, new):
+        """Booking store subscriber marking the snapshot stale"""
+        today = self._date
+        dates = {b['date'] for b in (old, new) if b}
+        if event == 'reload' or today is None or today in dates:
+            self._dirty = True
+            self._wake.set()
+
+    def start(self):
+        """Start the background thread if it is not running"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='status-scheduler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.store.refresh()
+                self._process()
+            except Exception as e:
+                logging.error(f"Status scheduler failed: {e}")
+            self._wake.wait(self._seconds_until_next())
+            self._wake.clear()
+
+    def _seconds_until_next(self):
+        now = self._now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        next_time = min(self._heap[0][0], midnight) if self._heap else midnight
+        return max(0.0, min((next_time - now).total_seconds(), MAX_SLEEP_SECONDS))
+
+    def _process(self):
+        """Rebuild the heap if stale, then apply all transitions that are due"""
+        with self._process_lock:
+            now = self._now()
+            if self._dirty or self._date != now.strftime('%Y-%m-%d'):
+                self._rebuild(now)
+            else:
+                self._advance(now)
+
+    def _rebuild(self, now):
+        """Recompute statuses and upcoming transitions for today"""
+        self._dirty = False
+        today = now.strftime('%Y-%m-%d')
+        current = now.hour * 60 + now.minute
+        day_start = datetime.strptime(today, '%Y-%m-%d')
+        statuses = {}
+        heap = []
+
+        for room_id in self.catalog.ids():
+            statuses[room_id] = 'available'
+            for booking in self.store.for_room_date(room_id, today):
+                try:
+                    start = time_to_minutes(booking['start_time'])
+                    end = time_to_minutes(booking['end_time'])
+                except ValueError as e:
+                    logging.error(f"Invalid time format in booking: {booking} - Error: {e}")
+                    continue
+
+                # Occupied from start (inclusive) to end (exclusive)
+                if start <= current < end:
+                    statuses[room_id] = 'occupied'
+                if start > current:
+                    heapq.heappush(heap, (day_start + timedelta(minutes=start), booking['id'], 'start', room_id, booking))
+                if end > current:
+                    heapq.heappush(heap, (day_start + timedelta(minutes=end), booking['id'], 'end', room_id, booking))
+
+        old_statuses = self._statuses
+        self._date = today
+        self._heap = heap
+        self._statuses = statuses
+        logging.debug(f"Status scheduler rebuilt for {today}: {len(heap)} upcoming transitions")
+
+        for room_id, status in statuses.items():
+            if old_statuses.get(room_id, status) != status:
+                self._emit(room_id, old_statuses[room_id], status, 'rebuild', None)
+
+    def _advance(self, now):
+        """Pop due transitions and update the snapshot"""
+        while self._heap and self._heap[0][0] <= now:
+            _, _, event, room_id, booking = heapq.heappop(self._heap)
+            old_status = self._statuses.get(room_id, 'available')
+            if event == 'start':
+                new_status = 'occupied'
+            else:
+                # Back-to-back bookings: another one may already have started
+                current = now.hour * 60 + now.minute
+                new_status = 'available'
+                for other in self.store.for_room_date(room_id, self._date):
+                    if time_to_minutes(other['start_time']) <= current < time_to_minutes(other['end_time']):
+                        new_status = 'occupied'
+                        break
+            # Swap in a new dict so readers never see a partial update
+            statuses = dict(self._statuses)
+            statuses[room_id] = new_status
+            self._statuses = statuses
+            self._emit(room_id, old_status, new_status, event, booking)
+
+    def _emit(self, room_id, old_status, new_status, event, booking):
+        logging.debug(f"Room {room_id} {event}: {old_status} -> {new_status}")
+        for callback in self._listeners:
+            try:
+                callback(room_id, old_status, new_status, event, booking)
+            except Exception as e:
+                logging.error(f"Status listener failed for room {room_id}: {e}")
+
+    def snapshot(self):
+        """Get the current status of every room, as of the last update by the thread"""
+        return dict(self._statuses)
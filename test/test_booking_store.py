@@ -0,0 +1,151 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from room_catalog import RoomCatalog
+from booking_store import BookingStore, MAX_COMMIT_RETRIES
+
+DATE = '2030-01-01'
+
+
+def no_overlap(booking, others):
+    """Validator rejecting bookings that overlap another one"""
+    for other in others:
+        if not (booking['end_time'] <= other['start_time'] or booking['start_time'] >= other['end_time']):
+            return 'room_unavailable'
+    return None
+
+
+def make_booking(start_time, end_time, room_id=1, date=DATE):
+    return {
+        'room_id': room_id,
+        'date': date,
+        'start_time': start_time,
+        'end_time': end_time,
+        'user_name': 'Test User',
+        'user_company': 'algapay',
+        'status': 'confirmed'
+    }
+
+
+class BookingStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rooms = [{'id': 1, 'name': 'Room', 'capacity': 8, 'location': '6 этаж', 'features': []}]
+        with open(os.path.join(self.directory, 'rooms.json'), 'w') as f:
+            json.dump(rooms, f)
+        self.catalog = RoomCatalog(os.path.join(self.directory, 'rooms.json'))
+        self.store = self.open_store()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open_store(self):
+        return BookingStore(os.path.join(self.directory, 'bookings'), self.catalog)
+
+    def test_ids_are_not_reused_after_delete(self):
+        first, _ = self.store.add(make_booking('09:00', '10:00'))
+        self.store.delete(first['id'])
+
+        second, _ = self.store.add(make_booking('09:00', '10:00'))
+        self.assertNotEqual(first['id'], second['id'])
+
+        # A fresh process continues from the stored sequence
+        third, _ = self.open_store().add(make_booking('11:00', '12:00'))
+        self.assertNotIn(third['id'], (first['id'], second['id']))
+
+    def test_stale_commit_conflicts_after_delete_and_add(self):
+        first, _ = self.store.add(make_booking('09:00', '10:00'))
+        shard = self.store._shard_for_room(1)
+        key = (1, DATE)
+        tokens = shard._tokens([key])
+
+        # Another writer deletes the newest booking and books 12:00-13:00
+        self.store.delete(first['id'])
+        self.store.add(make_booking('12:00', '13:00'))
+
+        _, _, error = shard._commit(tokens, None, None, dict(make_booking('12:00', '13:00'), version=1))
+        self.assertEqual(error, 'conflict')
+        self.assertEqual(len(self.store.for_room_date(1, DATE)), 1)
+
+    def test_add_retries_after_conflict(self):
+        calls = []
+
+        def validate(booking, others):
+            calls.append(len(others))
+            if len(calls) == 1:
+                # A concurrent writer commits between validation and commit
+                self.store.add(make_booking('09:00', '10:00'))
+            return no_overlap(booking, others)
+
+        booking, error = self.store.add(make_booking('09:30', '10:30'), validate=validate)
+        self.assertIsNone(booking)
+        self.assertEqual(error, 'room_unavailable')
+        self.assertEqual(calls, [0, 1])
+
+    def test_add_gives_up_after_repeated_conflicts(self):
+        slots = iter(['12:00', '13:00', '14:00', '15:00'])
+
+        def validate(booking, others):
+            start = next(slots)
+            self.store.add(make_booking(start, start[:2] + ':30'))
+            return None
+
+        booking, error = self.store.add(make_booking('09:00', '10:00'), validate=validate)
+        self.assertIsNone(booking)
+        self.assertEqual(error, 'booking_conflict')
+        self.assertEqual(len(self.store.for_room_date(1, DATE)), MAX_COMMIT_RETRIES)
+
+    def test_update_with_stale_version_is_rejected(self):
+        booking, _ = self.store.add(make_booking('09:00', '10:00'))
+        updated, error = self.store.update(booking['id'], {'purpose': 'Planning'}, expected_version=1)
+        self.assertIsNone(error)
+        self.assertEqual(updated['version'], 2)
+
+        stale, error = self.store.update(booking['id'], {'purpose': 'Retro'}, expected_version=1)
+        self.assertIsNone(stale)
+        self.assertEqual(error, 'booking_modified')
+        self.assertEqual(self.store.get(booking['id'])['purpose'], 'Planning')
+
+    def test_update_rejects_overlap(self):
+        self.store.add(make_booking('09:00', '10:00'))
+        other, _ = self.store.add(make_booking('11:00', '12:00'))
+        moved, error = self.store.update(other['id'], {'start_time': '09:30'}, validate=no_overlap)
+        self.assertIsNone(moved)
+        self.assertEqual(error, 'room_unavailable')
+
+    def test_changes_since_lists_writes_and_deletes(self):
+        kept, _ = self.store.add(make_booking('09:00', '10:00'))
+        removed, _ = self.store.add(make_booking('11:00', '12:00'))
+        state = self.store.sync_state()
+
+        self.store.delete(removed['id'])
+        added, _ = self.store.add(make_booking('13:00', '14:00'))
+
+        # Another worker sees the same changes for the same state
+        bookings, tombstones = self.open_store().changes_since(state)
+        self.assertEqual([b['id'] for b in bookings], [added['id']])
+        self.assertEqual([t['id'] for t in tombstones], [removed['id']])
+        self.assertNotIn(kept['id'], [b['id'] for b in bookings])
+
+    def test_changes_since_rejects_unknown_revision(self):
+        self.store.add(make_booking('09:00', '10:00'))
+        state = {number: revision + 1 for number, revision in self.store.sync_state().items()}
+        self.assertIsNone(self.store.changes_since(state))
+
+    def test_missing_registry_does_not_remigrate(self):
+        booking, _ = self.store.add(make_booking('09:00', '10:00'))
+        os.remove(os.path.join(self.directory, 'bookings', 'shards.json'))
+
+        with self.assertRaises(RuntimeError):
+            self.open_store().all()
+        shard_path = os.path.join(self.directory, 'bookings', '6-этаж.json')
+        with open(shard_path) as f:
+            self.assertEqual([b['id'] for b in json.load(f)['bookings']], [booking['id']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -83,7 +83,14 @@ TRANSLATIONS = {
         'status_note': 'Room status shown is for current time. Click "Book Room" to see detailed availability.',
         'no_rooms': 'No rooms available',
         'check_back': 'Please check back later or contact administrator.',
-        'Room': 'Room'
+        'Room': 'Room',
+        'month_view': 'Month View',
+        'utilization': 'Utilization',
+        'previous_month': 'Previous month',
+        'next_month': 'Next month',
+        'booking_modified': 'This booking was changed elsewhere. Please review it and try again.',
+        'booking_conflict': 'The room schedule is changing right now. Please try again.',
+        'subscribe_calendar': 'Subscribe in calendar'
     },
     'ru': {
         'app_title': 'Sapa Group',
@@ -166,7 +173,14 @@ TRANSLATIONS = {
         'status_note': 'Статус комнаты показан на текущее время. Нажмите "Забронировать" для подробной информации о доступности.',
         'no_rooms': 'Комнаты недоступны',
         'check_back': 'Пожалуйста, повторите попытку позже или обратитесь к администратору.',
-        'Room': 'Комната'
+        'Room': 'Комната',
+        'month_view': 'Месяц',
+        'utilization': 'Загрузка',
+        'previous_month': 'Предыдущий месяц',
+        'next_month': 'Следующий месяц',
+        'booking_modified': 'Бронирование было изменено в другом месте. Проверьте его и попробуйте снова.',
+        'booking_conflict': 'Расписание комнаты сейчас меняется. Попробуйте снова.',
+        'subscribe_calendar': 'Подписаться в календаре'
     },
     'kk': {
         'app_title': 'Sapa Group',
@@ -249,7 +263,14 @@ TRANSLATIONS = {
         'status_note': 'Бөлме статусы ағымдағы уақытқа көрсетілген. Қолжетімділік туралы толық ақпарат алу үшін "Брондау" түймесін басыңыз.',
         'no_rooms': 'Бөлмелер қолжетімді емес',
         'check_back': 'Кейінірек қайталап көріңіз немесе әкімшіге хабарласыңыз.',
-        'Room': 'Бөлме'
+        'Room': 'Бөлме',
+        'month_view': 'Ай',
+        'utilization': 'Жүктеме',
+        'previous_month': 'Алдыңғы ай',
+        'next_month': 'Келесі ай',
+        'booking_modified': 'Бұл брондау басқа жерде өзгертілді. Тексеріп, қайталап көріңіз.',
+        'booking_conflict': 'Бөлме кестесі қазір өзгеруде. Қайталап көріңіз.',
+        'subscribe_calendar': 'Күнтізбеге жазылу'
     }
 }
 
@@ -0,0 +1,120 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    name_key TEXT NOT NULL,
+    company TEXT NOT NULL,
+    name TEXT NOT NULL,
+    registered_at TEXT NOT NULL,
+    last_seen_at TEXT NOT NULL,
+    visits INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (name_key, company)
+)
+"""
+
+UPSERT = """
+INSERT INTO users (name_key, company, name, registered_at, last_seen_at, visits)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (name_key, company) DO UPDATE SET
+    name = excluded.name,
+    registered_at = MIN(registered_at, excluded.registered_at),
+    last_seen_at = MAX(last_seen_at, excluded.last_seen_at),
+    visits = visits + excluded.visits
+"""
+
+
+def normalize_name(name):
+    """Normalize a user name for deduplication"""
+    return ' '.join(name.split()).casefold()
+
+
+class UserRegistry:
+    """Deduplicated user registry backed by an indexed SQLite table.
+
+    Users are keyed by normalized (name, company). Registering an existing
+    user only updates its last-seen timestamp and visit count. Entries from
+    the legacy users.json file are imported and deduplicated the first time
+    the database is created; the import runs once per process under a
+    lock and inside an immediate transaction, so concurrent first requests
+    in any number of threads or workers import it only once.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection and commit (or roll back) when done"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            if not self._initialized:
+                self._initialize(conn)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize(self, conn):
+        """Create the schema and import legacy users once"""
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(SCHEMA)
+            conn.commit()
+            # Take the write lock before checking for an empty table, so
+            # another worker cannot import between the check and the insert
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._import_legacy(conn)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            self._initialized = True
+
+    def _import_legacy(self, conn):
+        """Import users.json into an empty registry"""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        if conn.execute('SELECT 1 FROM users LIMIT 1').fetchone():
+            return
+
+        try:
+            with open(self.legacy_path, 'r') as f:
+                users = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error importing legacy users: {e}")
+            return
+
+        rows = []
+        for user in users.values():
+            name = user.get('name', '').strip()
+            company = user.get('company', '').strip()
+            if not name or not company:
+                continue
+            seen = user.get('registered_at', '')
+            rows.append((normalize_name(name), company, name, seen, seen, 1))
+
+        conn.executemany(UPSERT, rows)
+        logging.info(f"Imported {len(rows)} legacy user records from {self.legacy_path}")
+
+    def register(self, name, company, now=None):
+        """Insert a user or update the last-seen time of an existing one"""
+        timestamp = (now or datetime.now()).isoformat()
+        try:
+            with self._connect() as conn:
+                conn.execute(UPSERT, (normalize_name(name), company, name, timestamp, timestamp, 1))
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Error saving user: {e}")
+            return False